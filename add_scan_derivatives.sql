@@ -0,0 +1,6 @@
+-- Column for image preprocessing derivatives (IMAGE_PREPROCESSING=true)
+-- Run this in your Supabase SQL Editor before enabling preprocessing.
+-- Holds public URLs keyed by name, e.g.
+-- {"analysis": ".../<sha256>_analysis.jpg", "thumbnail_256": ".../<sha256>_thumbnail_256.jpg"}
+
+ALTER TABLE scans ADD COLUMN IF NOT EXISTS derivatives JSONB;
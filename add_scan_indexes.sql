@@ -0,0 +1,25 @@
+-- Indexes for GET /api/v1/scans (keyset pagination + filters)
+-- Run this in your Supabase SQL Editor.
+-- CONCURRENTLY avoids locking writes; run each statement on its own
+-- (the SQL Editor must not wrap them in a transaction).
+--
+-- Column names follow what the API writes: the analysis JSON lives in
+-- "analysis" (adjust to "analysis_result" if your table uses the schema in
+-- fix_table_schema.sql).
+
+-- Keyset pagination: ORDER BY created_at DESC, id DESC with
+-- (created_at, id) < (cursor) is a single range scan on this index
+CREATE INDEX CONCURRENTLY IF NOT EXISTS scans_created_at_id_idx
+    ON scans (created_at DESC, id DESC);
+
+-- diagnosis / severity filters use JSONB containment (analysis @> '{...}')
+CREATE INDEX CONCURRENTLY IF NOT EXISTS scans_analysis_gin_idx
+    ON scans USING GIN (analysis jsonb_path_ops);
+
+-- Case-insensitive patient name prefix search (ILIKE 'abc%')
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS scans_patient_name_trgm_idx
+    ON scans USING GIN (patient_name gin_trgm_ops);
+
+-- Refresh planner statistics after bulk loads
+ANALYZE scans;
@@ -0,0 +1,9 @@
+-- Client-generated scan ids for write-behind inserts (SCAN_WRITE_BEHIND=true)
+-- Run this in your Supabase SQL Editor before enabling write-behind.
+-- The API assigns each new scan a UUID and returns it as the scan id before
+-- the row is inserted; buffered rows are upserted ON CONFLICT (uid) DO NOTHING,
+-- so replaying the local log after a crash never creates duplicates.
+-- Existing rows get a uid too and remain reachable by their numeric id.
+
+ALTER TABLE scans ADD COLUMN IF NOT EXISTS uid UUID NOT NULL DEFAULT gen_random_uuid();
+CREATE UNIQUE INDEX IF NOT EXISTS scans_uid_idx ON scans (uid);
@@ -1,68 +1,610 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
-from app.models.schemas import ScanResponse
-from app.services.storage import upload_file_to_storage
-from supabase import create_client
+from __future__ import annotations
+import math
+from typing import AsyncIterator, List, Optional, Tuple, TYPE_CHECKING
+from fastapi import (
+    APIRouter, Depends, UploadFile, File, Form, Query, HTTPException, Request, WebSocket, WebSocketDisconnect
+)
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.datastructures import Headers
+from pydantic import TypeAdapter, ValidationError
+from app.core.database import get_db
+from app.api.responses import ORJSONResponse
+from app.models.schemas import (
+    PatientData, ScanResponse, ScanPage, JobResponse, BatchUploadResponse, UploadInitRequest, UploadInitResponse,
+    ResumableUploadCreate, ResumableUploadStatus, AnalysisResult
+)
 from app.core.config import settings
+from app.core.logger import get_logger
+from app.core.metrics import observe_stage
+from app.core.resilience import DependencyUnavailableError
+from app.services.storage import upload_file_to_storage, digest_upload, FileTooLargeError
+from app.services.jobs import (
+    Job, QueueFullError, get_job_pool, job_event, AWAITING_UPLOAD, QUEUED, SUCCEEDED, FAILED
+)
+from app.services.events import ALL, Subscription, SubscriberLimitError, get_event_broker
+from app.services.scans import analyze_and_save, get_scan, list_scans
+from app.services.cache import get_analysis_cache, get_response_cache
+from app.services.batch import upload_batch
+from app.services.imaging import preprocess_upload, InvalidImageError
+from app.services.direct_upload import (
+    create_direct_upload, verify_direct_upload, UploadNotFoundError, UploadExpiredError
+)
+from app.services.resumable import (
+    UploadSession, UploadSessionNotFoundError, ChunkRangeError, get_resumable_store
+)
 import json
+import orjson
 
-# --- THIS IS THE LINE YOU ASKED ABOUT ---
-from app.services.ai_stub import analyze_scan 
-# ----------------------------------------
+if TYPE_CHECKING:
+    from supabase import Client
 
 router = APIRouter(prefix="/api/v1", tags=["scans"])
+logger = get_logger(__name__)
 
-# Create a fresh DB connection (Fixes the "Coroutine" Error 500)
-supabase = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
 
-@router.post("/upload", response_model=ScanResponse)
+def _service_unavailable(e: DependencyUnavailableError) -> HTTPException:
+    """503 with Retry-After for a dependency that is down, saturated or timing out."""
+    return HTTPException(
+        status_code=503,
+        detail=str(e),
+        headers={"Retry-After": str(math.ceil(e.retry_after))}
+    )
+
+
+_PATIENT_LIST = TypeAdapter(List[PatientData])
+
+
+def _invalid_patient_data(e: ValidationError) -> HTTPException:
+    """400 for malformed JSON, 422 with the field errors for invalid patient data."""
+    if any(error["type"] == "json_invalid" for error in e.errors()):
+        return HTTPException(400, "Invalid JSON in patient_data")
+    return HTTPException(422, e.errors(include_url=False, include_context=False, include_input=False))
+
+
+def _job_body(job: Job) -> dict:
+    """JobResponse fields of a job (never its internal payload)."""
+    return {name: getattr(job, name) for name in JobResponse.model_fields}
+
+
+def _accepted(job: Job) -> ORJSONResponse:
+    """202 for a job handed to the background workers."""
+    return ORJSONResponse(
+        status_code=202,
+        content=_job_body(job),
+        headers={"Location": f"{router.prefix}/jobs/{job.id}"}
+    )
+
+
+async def _process_upload(db: Client, file: UploadFile, p_data: dict, run_async: bool):
+    """
+    Steps shared by every upload path once the file is local: digest,
+    preprocess, store, then analyse + save inline or as a background job.
+    """
+    # 2. Upload to Storage
+    try:
+        with observe_stage("digest"):
+            digest = await digest_upload(file, settings.max_upload_bytes)
+    except FileTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    logger.debug("Upload spooled", extra={"size": digest.size, "sha256": digest.sha256})
+    try:
+        preprocessed = await preprocess_upload(db, file, digest.sha256)
+    except InvalidImageError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if preprocessed is not None:
+        # Only the metadata-free copy is stored; the hash still keys dedup and caching
+        file_url, derivatives = preprocessed.original_url, preprocessed.derivatives
+    else:
+        file_url = await upload_file_to_storage(
+            db, file.file, file.filename, file.content_type, content_hash=digest.sha256
+        )
+        derivatives = None
+    logger.debug("File stored", extra={"file_url": file_url})
+
+    # 2b. Async mode: hand analysis + DB insert to the background workers
+    if run_async:
+        job = Job(payload={
+            "file_url": file_url,
+            "patient_data": p_data,
+            "content_hash": digest.sha256,
+            "derivatives": derivatives
+        })
+        try:
+            await get_job_pool().queue.submit(job)
+        except QueueFullError as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        logger.info("Upload queued", extra={"job_id": job.id})
+        return _accepted(job)
+
+    # 3. Azure AI Analysis + 4. Save to Database
+    async def log_stage(stage: str) -> None:
+        logger.debug("Upload stage: %s", stage)
+
+    scan = await analyze_and_save(
+        db, file_url, p_data, on_stage=log_stage,
+        content_hash=digest.sha256, derivatives=derivatives
+    )
+
+    # 5. Success! (built from validated data, so sent without re-validation)
+    logger.info("Scan saved", extra={"scan_id": scan["id"]})
+    return ORJSONResponse(scan)
+
+
+@router.post(
+    "/upload",
+    response_model=ScanResponse,
+    responses={202: {"model": JobResponse, "description": "Accepted for background processing"}}
+)
 async def upload_scan(
     file: UploadFile = File(...),
-    patient_data: str = Form(...)
+    patient_data: str = Form(...),
+    run_async: bool = Query(False, alias="async", description="Return 202 with a job id after storing the file"),
+    db: Client = Depends(get_db)
 ):
     try:
-        print("1. Starting Upload...")
+        logger.info("Upload started", extra={"upload_filename": file.filename})
         
-        # 1. Parse Data
+        # 1. Parse and validate Data in one pass
         try:
-            p_data = json.loads(patient_data)
-        except:
-            raise HTTPException(400, "Invalid JSON in patient_data")
-
-        # 2. Upload to Storage
-        print("2. Uploading file...")
-        content = await file.read()
-        file_url = await upload_file_to_storage(content, file.filename, file.content_type)
-        print(f"   -> File URL: {file_url}")
-
-        # 3. Azure AI Analysis
-        print("3. Calling Azure AI...")
-        analysis = await analyze_scan(file_url)
-        print(f"   -> AI Result: {analysis}")
-
-        # 4. Save to Database (Synchronous - Fixes crash)
-        print("4. Saving to DB...")
-        data = {
-            "patient_name": p_data.get("patient_name", "Unknown"),
-            "age": p_data.get("age", 0),
-            "file_url": file_url,
-            "analysis": analysis
-        }
-        
-        response = supabase.table("scans").insert(data).execute()
-        
-        # 5. Success!
-        record = response.data[0]
-        print("✅ Success! Scan saved.")
-
-        return {
-            "id": record["id"],
-            "patient_name": record["patient_name"],
-            "age": record["age"],
-            "image_url": record["file_url"],
-            "analysis_result": record["analysis"],
-            "created_at": record["created_at"]
-        }
+            with observe_stage("parse"):
+                p_data = PatientData.model_validate_json(patient_data).model_dump()
+        except ValidationError as e:
+            raise _invalid_patient_data(e)
+
+        return await _process_upload(db, file, p_data, run_async)
+
+    except HTTPException:
+        raise
+    except DependencyUnavailableError as e:
+        logger.warning("Upload failed fast: %s", e, extra={"dependency": e.dependency})
+        raise _service_unavailable(e)
+    except Exception as e:
+        logger.exception("Upload failed: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/upload/batch", response_model=BatchUploadResponse)
+async def upload_scan_batch(
+    files: List[UploadFile] = File(...),
+    patient_data: str = Form(..., description="JSON array with one patient object per file, in order"),
+    db: Client = Depends(get_db)
+):
+    """Upload, analyse and save several scans in one request."""
+    try:
+        p_data = [patient.model_dump() for patient in _PATIENT_LIST.validate_json(patient_data)]
+    except ValidationError as e:
+        raise _invalid_patient_data(e)
+    if len(p_data) != len(files):
+        raise HTTPException(400, "patient_data must be a JSON array with one entry per file")
+    if len(files) > settings.batch_max_files:
+        raise HTTPException(413, f"A batch may contain at most {settings.batch_max_files} files")
+
+    logger.info("Batch upload started", extra={"files": len(files)})
+    results = await upload_batch(db, list(zip(files, p_data)))
+    succeeded = sum(1 for result in results if result["error"] is None)
+    logger.info("Batch upload done", extra={"succeeded": succeeded, "files": len(results)})
+    return {"succeeded": succeeded, "failed": len(results) - succeeded, "results": results}
+
+
+@router.post("/uploads/init", response_model=UploadInitResponse, status_code=201)
+async def init_direct_upload(request: UploadInitRequest, db: Client = Depends(get_db)):
+    """
+    Start a direct-to-storage upload.
+
+    PUT the file to the returned signed URL (the bytes never pass through the
+    API), then POST to complete_url. /upload remains available as a fallback.
+    Unavailable (409) while image preprocessing is on: the object would be
+    published with its metadata, which preprocessing guarantees to remove.
+    """
+    if settings.image_preprocessing:
+        raise HTTPException(
+            status_code=409,
+            detail="Direct uploads are disabled while image preprocessing is enabled; "
+                   "use /upload or /uploads/resumable"
+        )
+    try:
+        upload = await create_direct_upload(db, request.model_dump())
+    except FileTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except DependencyUnavailableError as e:
+        raise _service_unavailable(e)
+    except Exception as e:
+        logger.exception("Direct upload init failed: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+    job = upload["job"]
+    await get_job_pool().queue.update(job)
+    logger.info("Direct upload initialised", extra={"job_id": job.id, "path": upload["path"]})
+    return {
+        "id": job.id,
+        "upload_url": upload["upload_url"],
+        "token": upload["token"],
+        "path": upload["path"],
+        "complete_url": f"{router.prefix}/uploads/{job.id}/complete",
+        "expires_at": upload["expires_at"]
+    }
+
+
+@router.post(
+    "/uploads/{upload_id}/complete",
+    response_model=ScanResponse,
+    responses={202: {"model": JobResponse, "description": "Accepted for background processing"}}
+)
+async def complete_direct_upload(
+    upload_id: str,
+    run_async: bool = Query(False, alias="async", description="Return 202 with the job instead of waiting"),
+    db: Client = Depends(get_db)
+):
+    """Verify a direct upload and run analysis and persistence, like /upload."""
+    queue = get_job_pool().queue
+    # Claim the upload so a concurrent complete (on any worker) gets 409
+    job = await queue.claim(upload_id, AWAITING_UPLOAD)
+    if job is None:
+        current = await queue.get(upload_id)
+        if current is None:
+            raise HTTPException(status_code=404, detail="Upload not found")
+        raise HTTPException(status_code=409, detail=f"Upload is already {current.status}")
+
+    job.stage = "verifying"
+    job.error = None
+    await queue.update(job)
+    try:
+        job.payload["file_url"] = await verify_direct_upload(db, job)
+    except Exception as e:
+        job.status = AWAITING_UPLOAD
+        job.stage = AWAITING_UPLOAD
+        await queue.update(job)
+        if isinstance(e, UploadNotFoundError):
+            raise HTTPException(status_code=409, detail=str(e))
+        if isinstance(e, UploadExpiredError):
+            raise HTTPException(status_code=410, detail=str(e))
+        if isinstance(e, FileTooLargeError):
+            raise HTTPException(status_code=413, detail=str(e))
+        if isinstance(e, DependencyUnavailableError):
+            raise _service_unavailable(e)
+        logger.exception("Direct upload verification failed: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+    job.stage = "stored"
+    if run_async:
+        job.status = QUEUED
+        try:
+            await queue.submit(job)
+        except QueueFullError as e:
+            job.status = AWAITING_UPLOAD
+            job.stage = AWAITING_UPLOAD
+            await queue.update(job)
+            raise HTTPException(status_code=503, detail=str(e))
+        logger.info("Direct upload queued", extra={"job_id": job.id})
+        return _accepted(job)
+
+    async def on_stage(stage: str) -> None:
+        job.stage = stage
+        await queue.update(job)
+
+    try:
+        scan = await analyze_and_save(
+            db, job.payload["file_url"], job.payload["patient_data"], on_stage=on_stage
+        )
+    except Exception as e:
+        # The file stays in storage, so completing again retries the analysis
+        job.status = AWAITING_UPLOAD
+        job.stage = AWAITING_UPLOAD
+        job.error = str(e)
+        await queue.update(job)
+        if isinstance(e, DependencyUnavailableError):
+            raise _service_unavailable(e)
+        logger.exception("Direct upload failed: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+    job.status = SUCCEEDED
+    job.stage = "done"
+    job.result = scan
+    await queue.update(job)
+    logger.info("Scan saved", extra={"scan_id": scan["id"], "job_id": job.id})
+    return ORJSONResponse(scan)
+
 
+def _resumable_status(session: UploadSession) -> dict:
+    return {
+        "id": session.id,
+        "size": session.size,
+        "received": session.received,
+        "received_bytes": session.received_bytes,
+        "complete": session.is_complete,
+        "chunk_size": settings.resumable_chunk_size,
+        "expires_at": session.expires_at
+    }
+
+
+@router.post("/uploads/resumable", response_model=ResumableUploadStatus, status_code=201)
+async def create_resumable_upload(request: ResumableUploadCreate):
+    """
+    Start a resumable upload.
+
+    PUT the file in chunks to the returned session with ?offset=<byte offset>
+    (any order, retry what fails), GET the session to see which ranges have
+    arrived, then POST .../finalize.
+    """
+    if request.size > settings.max_upload_bytes:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File exceeds the maximum upload size of {settings.max_upload_bytes} bytes"
+        )
+    session = get_resumable_store().create(
+        request.size,
+        request.filename,
+        request.content_type,
+        {"patient_name": request.patient_name, "age": request.age}
+    )
+    logger.info("Resumable upload started", extra={"upload_id": session.id, "size": session.size})
+    return JSONResponse(
+        status_code=201,
+        content=ResumableUploadStatus(**_resumable_status(session)).model_dump(mode="json"),
+        headers={"Location": f"{router.prefix}/uploads/resumable/{session.id}"}
+    )
+
+
+@router.get("/uploads/resumable/{upload_id}", response_model=ResumableUploadStatus)
+async def get_resumable_upload(upload_id: str):
+    """Report which byte ranges of a resumable upload have been received."""
+    try:
+        return _resumable_status(get_resumable_store().get(upload_id))
+    except UploadSessionNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.put("/uploads/resumable/{upload_id}", response_model=ResumableUploadStatus)
+async def put_resumable_chunk(
+    upload_id: str,
+    request: Request,
+    offset: int = Query(..., ge=0, description="Byte offset of this chunk in the file")
+):
+    """
+    Write the raw request body at offset.
+
+    Bytes are kept as they arrive, so if the connection drops mid-chunk the
+    response of a later GET shows exactly what still has to be resent.
+    """
+    try:
+        session = await get_resumable_store().write_chunk(upload_id, offset, request.stream())
+    except UploadSessionNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ChunkRangeError as e:
+        raise HTTPException(status_code=416, detail=str(e))
+    return _resumable_status(session)
+
+
+@router.post(
+    "/uploads/resumable/{upload_id}/finalize",
+    response_model=ScanResponse,
+    responses={202: {"model": JobResponse, "description": "Accepted for background processing"}}
+)
+async def finalize_resumable_upload(
+    upload_id: str,
+    run_async: bool = Query(False, alias="async", description="Return 202 with a job id after storing the file"),
+    db: Client = Depends(get_db)
+):
+    """Process a fully received resumable upload exactly like /upload."""
+    store = get_resumable_store()
+    try:
+        # Held throughout, across workers, so a concurrent finalize waits and then gets 404
+        async with store.lock(upload_id):
+            session = store.get(upload_id)
+            if not session.is_complete:
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"Upload is incomplete: {session.received_bytes} of {session.size} bytes received"
+                )
+
+            file = UploadFile(
+                file=open(store.data_path(upload_id), "rb"),
+                size=session.size,
+                filename=session.filename,
+                headers=Headers({"content-type": session.content_type})
+            )
+            try:
+                result = await _process_upload(db, file, session.patient_data, run_async)
+            except HTTPException:
+                raise
+            except DependencyUnavailableError as e:
+                logger.warning("Resumable upload failed fast: %s", e, extra={"dependency": e.dependency})
+                raise _service_unavailable(e)
+            except Exception as e:
+                # The staged file is kept, so finalizing again retries
+                logger.exception("Resumable upload failed: %s", e)
+                raise HTTPException(status_code=500, detail=str(e))
+            finally:
+                await file.close()
+
+            store.delete(upload_id)
+            return result
+    except UploadSessionNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str):
+    """Report the status, stage and result of a background upload job."""
+    job = await get_job_pool().queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return ORJSONResponse(_job_body(job))
+
+
+async def _subscribe(job_id: Optional[str]) -> Tuple[Subscription, Optional[Job]]:
+    """Subscribe to one job's events (or all jobs'); raises 404 / 503 as HTTPException."""
+    job = None
+    if job_id is not None:
+        job = await get_job_pool().queue.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+    try:
+        return get_event_broker().subscribe(job_id or ALL), job
+    except SubscriberLimitError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+
+
+async def _job_events(subscription: Subscription, job: Optional[Job]) -> AsyncIterator[Optional[dict]]:
+    """
+    Yield events for a subscription, and None whenever the stream has been
+    idle for events_heartbeat_interval. A single-job stream starts with the
+    job's current state (so a late subscriber still sees the outcome) and
+    ends once the job has succeeded or failed.
+    """
+    try:
+        if job is not None:
+            # Re-read: it may have changed between the lookup and subscribing
+            job = await get_job_pool().queue.get(job.id) or job
+            yield job_event(job)
+            if job.status in (SUCCEEDED, FAILED):
+                return
+        while True:
+            event = await subscription.next(settings.events_heartbeat_interval)
+            yield event
+            if job is not None and event is not None and event["status"] in (SUCCEEDED, FAILED):
+                return
+    finally:
+        get_event_broker().unsubscribe(subscription)
+
+
+@router.get("/events", tags=["events"], response_class=StreamingResponse)
+async def stream_job_events(
+    job_id: Optional[str] = Query(None, description="Only this job's events (default: every job)")
+):
+    """
+    Server-sent events for background jobs: stored, analyzing, analyzed,
+    saving, done (with scan_id) and failed. Idle streams get a comment line
+    every EVENTS_HEARTBEAT_INTERVAL seconds.
+    """
+    subscription, job = await _subscribe(job_id)
+
+    async def body() -> AsyncIterator[str]:
+        async for event in _job_events(subscription, job):
+            if event is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        # Proxies must pass events through as they are written
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.websocket("/events/ws")
+async def job_events_websocket(websocket: WebSocket, job_id: Optional[str] = None):
+    """The /events stream over a WebSocket: one JSON message per event; {"type": "ping"} when idle."""
+    try:
+        subscription, job = await _subscribe(job_id)
+    except HTTPException as e:
+        await websocket.close(code=1011 if e.status_code == 503 else 1008, reason=e.detail)
+        return
+    await websocket.accept()
+    try:
+        async for event in _job_events(subscription, job):
+            await websocket.send_json(event or {"type": "ping"})
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+
+
+@router.get("/scans", response_model=ScanPage, response_model_exclude_none=True)
+async def read_scans(
+    limit: int = Query(50, ge=1, le=200, description="Page size"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    patient_name: Optional[str] = Query(None, max_length=255, description="Patient name prefix (case-insensitive)"),
+    min_age: Optional[int] = Query(None, ge=0, le=150),
+    max_age: Optional[int] = Query(None, ge=0, le=150),
+    diagnosis: Optional[str] = Query(None, description="Exact diagnosis in the analysis result"),
+    severity: Optional[str] = Query(None, description="Exact severity in the analysis result"),
+    include_analysis: bool = Query(False, description="Include the full analysis JSON"),
+    db: Client = Depends(get_db)
+):
+    """List scans newest first with cursor pagination and filters."""
+    try:
+        return await list_scans(
+            db,
+            limit,
+            cursor=cursor,
+            name_prefix=patient_name,
+            min_age=min_age,
+            max_age=max_age,
+            diagnosis=diagnosis,
+            severity=severity,
+            include_analysis=include_analysis
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except DependencyUnavailableError as e:
+        raise _service_unavailable(e)
     except Exception as e:
-        print(f"🔥 ERROR: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        logger.exception("Scan read failed: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches etag (weak comparison, as RFC 9110 requires)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+async def _cached_scan_read(request: Request, db: Client, scan_id: str, part: str) -> Response:
+    """
+    Serve a scan ("scan") or its analysis result ("analysis") from the response cache.
+
+    Scans never change after insert, so the serialized body and its ETag are
+    cached per scan; a matching If-None-Match is answered with 304.
+    """
+    cache = get_response_cache()
+    key = f"{part}:{scan_id}"
+    cached = await cache.get(key)
+    if cached is None:
+        try:
+            scan = await get_scan(db, scan_id)
+        except DependencyUnavailableError as e:
+            raise _service_unavailable(e)
+        except Exception as e:
+            logger.exception("Scan read failed: %s", e)
+            raise HTTPException(status_code=500, detail=str(e))
+        if scan is None:
+            raise HTTPException(status_code=404, detail="Scan not found")
+        scan_body = ScanResponse(**scan).model_dump_json().encode()
+        analysis_body = orjson.dumps(scan["analysis_result"])
+        # One query fills both entries; dashboards usually poll both
+        scan_entry = await cache.set(f"scan:{scan_id}", scan_body)
+        analysis_entry = await cache.set(f"analysis:{scan_id}", analysis_body)
+        cached = scan_entry if part == "scan" else analysis_entry
+
+    etag, body = cached
+    headers = {"ETag": etag, "Cache-Control": f"private, max-age={settings.scan_http_max_age}"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+@router.get("/scans/{scan_id}", response_model=ScanResponse, responses={304: {"description": "Not modified"}})
+async def read_scan(scan_id: str, request: Request, db: Client = Depends(get_db)):
+    """Fetch a saved scan by id. Sends an ETag; If-None-Match answers 304."""
+    return await _cached_scan_read(request, db, scan_id, "scan")
+
+
+@router.get(
+    "/scans/{scan_id}/analysis",
+    response_model=AnalysisResult,
+    responses={304: {"description": "Not modified"}}
+)
+async def read_scan_analysis(scan_id: str, request: Request, db: Client = Depends(get_db)):
+    """Fetch only the AI analysis result of a scan. Sends an ETag; If-None-Match answers 304."""
+    return await _cached_scan_read(request, db, scan_id, "analysis")
+
+
+@router.get("/cache/stats", tags=["health"])
+async def cache_stats() -> dict:
+    """Hit/miss counters of the analysis result cache (and, under "responses", the scan response cache)."""
+    return {**get_analysis_cache().stats(), "responses": get_response_cache().stats()}
@@ -0,0 +1,112 @@
+"""ASGI middleware for the API."""
+import time
+import uuid
+from fastapi import HTTPException
+from starlette.datastructures import MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.logger import request_id_var
+from app.core.metrics import HTTP_IN_FLIGHT, HTTP_REQUEST_DURATION, HTTP_REQUESTS
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+
+class MaxBodySizeMiddleware:
+    """
+    Reject request bodies larger than max_body_size with 413.
+
+    A declared Content-Length over the limit is rejected before any of the
+    body is read (a malformed one with 400); chunked bodies are counted as they stream in and aborted
+    as soon as they cross the limit.
+    """
+
+    def __init__(self, app: ASGIApp, max_body_size: int):
+        self.app = app
+        self.max_body_size = max_body_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        detail = f"Request body exceeds the maximum upload size of {self.max_body_size} bytes"
+
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                try:
+                    declared = int(value)
+                except ValueError:
+                    declared = -1
+                if declared < 0:
+                    response = JSONResponse({"detail": "Invalid Content-Length header"}, status_code=400)
+                    await response(scope, receive, send)
+                    return
+                if declared > self.max_body_size:
+                    response = JSONResponse({"detail": detail}, status_code=413)
+                    await response(scope, receive, send)
+                    return
+                break
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_size:
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+class RequestContextMiddleware:
+    """
+    Assign every request an id and record request metrics.
+
+    The id is taken from an incoming X-Request-ID header (or generated),
+    made available to log records through request_id_var and echoed in the
+    response headers. Latency and status are recorded per route template
+    (e.g. /api/v1/scans/{scan_id}) so metric cardinality stays bounded.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                # Bound client-supplied ids before they reach the logs
+                request_id = value.decode("latin-1")[:128]
+                break
+        request_id = request_id or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+
+        status_code = 500
+
+        async def send_with_request_id(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message)[REQUEST_ID_HEADER] = request_id
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            elapsed = time.perf_counter() - start
+            HTTP_IN_FLIGHT.dec()
+            # The router stores the matched route in the scope; unmatched paths share one label
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            HTTP_REQUEST_DURATION.labels(method=scope["method"], route=path).observe(elapsed)
+            HTTP_REQUESTS.labels(method=scope["method"], route=path, status=str(status_code)).inc()
+            request_id_var.reset(token)
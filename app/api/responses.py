@@ -0,0 +1,17 @@
+"""Response classes for the API."""
+from typing import Any
+import orjson
+from starlette.responses import JSONResponse
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson.
+
+    Endpoints return it directly for bodies built from already validated
+    data, which skips FastAPI's response_model re-validation as well as the
+    slower standard library encoder. datetimes are rendered as RFC 3339.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
@@ -1,5 +1,5 @@
 """Configuration management using Pydantic BaseSettings."""
-from typing import Optional
+from typing import Optional, List
 
 try:
     # Pydantic v2
@@ -41,12 +41,551 @@ class Settings(BaseSettings):
         env="DEBUG",
         description="Debug mode"
     )
-    
+
+    # Server process (python main.py, see app/core/server.py)
+    server_host: str = Field(
+        default="0.0.0.0",
+        env="SERVER_HOST",
+        description="Interface to listen on"
+    )
+
+    server_port: int = Field(
+        default=8000,
+        ge=1,
+        le=65535,
+        env="SERVER_PORT",
+        description="Port to listen on"
+    )
+
+    server_workers: int = Field(
+        default=1,
+        ge=0,
+        env="SERVER_WORKERS",
+        description="Worker processes sharing the socket (0 = one per CPU core)"
+    )
+
+    server_loop: str = Field(
+        default="auto",
+        env="SERVER_LOOP",
+        description="Event loop: 'auto' (uvloop when installed), 'uvloop' or 'asyncio'"
+    )
+
+    server_http: str = Field(
+        default="auto",
+        env="SERVER_HTTP",
+        description="HTTP parser: 'auto' (httptools when installed), 'httptools' or 'h11'"
+    )
+
+    server_backlog: int = Field(
+        default=2048,
+        ge=1,
+        env="SERVER_BACKLOG",
+        description="Listen backlog: connections the kernel queues while workers are busy"
+    )
+
+    server_keepalive_timeout: float = Field(
+        default=5.0,
+        ge=0,
+        env="SERVER_KEEPALIVE_TIMEOUT",
+        description="Seconds an idle keep-alive connection stays open (keep above a load balancer's idle timeout)"
+    )
+
+    server_limit_concurrency: Optional[int] = Field(
+        default=None,
+        ge=1,
+        env="SERVER_LIMIT_CONCURRENCY",
+        description="Connections plus tasks per worker before new requests get 503 (unlimited when unset)"
+    )
+
+    server_graceful_timeout: float = Field(
+        default=30.0,
+        ge=0,
+        env="SERVER_GRACEFUL_TIMEOUT",
+        description="Seconds a worker waits for in-flight requests on shutdown before closing them"
+    )
+
+    server_access_log: bool = Field(
+        default=False,
+        env="SERVER_ACCESS_LOG",
+        description="uvicorn access log (request metrics and logs already cover every request)"
+    )
+
+    # Logging (see app/core/logger.py)
+    log_level: str = Field(
+        default="INFO",
+        env="LOG_LEVEL",
+        description="Minimum level of application log records (DEBUG, INFO, WARNING, ERROR)"
+    )
+
+    log_json: bool = Field(
+        default=True,
+        env="LOG_JSON",
+        description="Emit one JSON object per log line (plain text when false)"
+    )
+
+    max_upload_bytes: int = Field(
+        default=250 * 1024 * 1024,
+        ge=1,
+        env="MAX_UPLOAD_BYTES",
+        description="Largest accepted request body / scan file in bytes (larger uploads get 413)"
+    )
+
+    batch_max_files: int = Field(
+        default=50,
+        ge=1,
+        env="BATCH_MAX_FILES",
+        description="Maximum number of files accepted by /api/v1/upload/batch"
+    )
+
+    batch_upload_concurrency: int = Field(
+        default=8,
+        ge=1,
+        env="BATCH_UPLOAD_CONCURRENCY",
+        description="Storage uploads in flight per batch request"
+    )
+
+    direct_upload_expiry: int = Field(
+        default=7200,
+        ge=60,
+        env="DIRECT_UPLOAD_EXPIRY",
+        description="Seconds a direct-to-storage upload may take between init and complete "
+                    "(Supabase signed upload URLs are valid for 2 hours)"
+    )
+
+    resumable_upload_dir: Optional[str] = Field(
+        default=None,
+        env="RESUMABLE_UPLOAD_DIR",
+        description="Directory staging resumable upload chunks (default: <tmp>/rheumalens-resumable); "
+                    "share it between workers on one host"
+    )
+
+    resumable_upload_expiry: int = Field(
+        default=24 * 60 * 60,
+        ge=60,
+        env="RESUMABLE_UPLOAD_EXPIRY",
+        description="Seconds a resumable upload session is kept before it must be restarted"
+    )
+
+    resumable_purge_interval: float = Field(
+        default=600.0,
+        ge=1,
+        env="RESUMABLE_PURGE_INTERVAL",
+        description="Seconds between sweeps deleting the staging files of expired resumable uploads"
+    )
+
+    resumable_chunk_size: int = Field(
+        default=8 * 1024 * 1024,
+        ge=256 * 1024,
+        env="RESUMABLE_CHUNK_SIZE",
+        description="Chunk size suggested to clients of resumable uploads"
+    )
+
+    # Supabase connection pool (one shared client, see app/core/database.py)
+    supabase_max_connections: int = Field(
+        default=20,
+        ge=1,
+        env="SUPABASE_MAX_CONNECTIONS",
+        description="Maximum open HTTP connections to Supabase"
+    )
+
+    supabase_max_keepalive_connections: int = Field(
+        default=20,
+        ge=0,
+        env="SUPABASE_MAX_KEEPALIVE_CONNECTIONS",
+        description="Idle connections kept warm for reuse"
+    )
+
+    supabase_keepalive_expiry: float = Field(
+        default=60.0,
+        gt=0,
+        env="SUPABASE_KEEPALIVE_EXPIRY",
+        description="Seconds an idle keep-alive connection is kept open"
+    )
+
+    supabase_http2: bool = Field(
+        default=True,
+        env="SUPABASE_HTTP2",
+        description="Use HTTP/2 when the server supports it"
+    )
+
+    supabase_connect_timeout: float = Field(
+        default=5.0,
+        gt=0,
+        env="SUPABASE_CONNECT_TIMEOUT",
+        description="Seconds to wait when opening a connection"
+    )
+
+    supabase_read_timeout: float = Field(
+        default=30.0,
+        gt=0,
+        env="SUPABASE_READ_TIMEOUT",
+        description="Seconds to wait for response data"
+    )
+
+    supabase_write_timeout: float = Field(
+        default=30.0,
+        gt=0,
+        env="SUPABASE_WRITE_TIMEOUT",
+        description="Seconds to wait while sending request data (e.g. image uploads)"
+    )
+
+    supabase_pool_timeout: float = Field(
+        default=5.0,
+        gt=0,
+        env="SUPABASE_POOL_TIMEOUT",
+        description="Seconds to wait for a free connection from the pool"
+    )
+
+    db_executor_workers: int = Field(
+        default=16,
+        ge=1,
+        env="DB_EXECUTOR_WORKERS",
+        description="Size of the thread pool running blocking Supabase storage/table calls "
+                    "(keep at or below SUPABASE_MAX_CONNECTIONS)"
+    )
+
+    # Resilience of outbound calls (see app/core/resilience.py). Storage and
+    # table bulkheads together should not exceed DB_EXECUTOR_WORKERS, so a
+    # stalled storage backend cannot take the threads table calls need (a
+    # timed-out call keeps its bulkhead slot until its thread is free again).
+    storage_timeout: float = Field(
+        default=120.0,
+        gt=0,
+        env="STORAGE_TIMEOUT",
+        description="Seconds one storage call (existence check, upload) may take"
+    )
+
+    storage_retries: int = Field(
+        default=2,
+        ge=0,
+        env="STORAGE_RETRIES",
+        description="Retries of idempotent storage calls after a transient failure"
+    )
+
+    storage_max_concurrency: int = Field(
+        default=8,
+        ge=1,
+        env="STORAGE_MAX_CONCURRENCY",
+        description="Storage calls in flight at once (bulkhead)"
+    )
+
+    db_timeout: float = Field(
+        default=15.0,
+        gt=0,
+        env="DB_TIMEOUT",
+        description="Seconds one table query or insert may take"
+    )
+
+    db_retries: int = Field(
+        default=2,
+        ge=0,
+        env="DB_RETRIES",
+        description="Retries of table reads after a transient failure (inserts are not retried)"
+    )
+
+    db_max_concurrency: int = Field(
+        default=8,
+        ge=1,
+        env="DB_MAX_CONCURRENCY",
+        description="Table calls in flight at once (bulkhead)"
+    )
+
+    analysis_retries: int = Field(
+        default=1,
+        ge=0,
+        env="ANALYSIS_RETRIES",
+        description="Retries of an analysis after a transient failure"
+    )
+
+    analysis_max_pending: int = Field(
+        default=256,
+        ge=1,
+        env="ANALYSIS_MAX_PENDING",
+        description="Analyses queued or running at once (bulkhead)"
+    )
+
+    bulkhead_max_wait: float = Field(
+        default=1.0,
+        ge=0,
+        env="BULKHEAD_MAX_WAIT",
+        description="Seconds a call waits for a free bulkhead slot before failing with 503"
+    )
+
+    retry_backoff_base: float = Field(
+        default=0.2,
+        gt=0,
+        env="RETRY_BACKOFF_BASE",
+        description="Backoff before the first retry in seconds; doubles per retry (full jitter)"
+    )
+
+    retry_backoff_max: float = Field(
+        default=5.0,
+        gt=0,
+        env="RETRY_BACKOFF_MAX",
+        description="Upper bound of the retry backoff in seconds"
+    )
+
+    circuit_failure_threshold: int = Field(
+        default=5,
+        ge=1,
+        env="CIRCUIT_FAILURE_THRESHOLD",
+        description="Consecutive transient failures that open a dependency's circuit"
+    )
+
+    circuit_reset_timeout: float = Field(
+        default=30.0,
+        gt=0,
+        env="CIRCUIT_RESET_TIMEOUT",
+        description="Seconds an open circuit fails fast before letting a trial call through"
+    )
+
+    # AI analysis engine and micro-batching
+    analysis_engine: str = Field(
+        default="stub",
+        env="ANALYSIS_ENGINE",
+        description="Analysis backend: 'stub', 'local' or 'remote'"
+    )
+
+    analysis_max_batch_size: int = Field(
+        default=16,
+        ge=1,
+        env="ANALYSIS_MAX_BATCH_SIZE",
+        description="Most images sent to the engine in one inference call (1 disables batching)"
+    )
+
+    analysis_max_wait_ms: float = Field(
+        default=20,
+        ge=0,
+        env="ANALYSIS_MAX_WAIT_MS",
+        description="Longest a request waits for a batch to fill before it is dispatched"
+    )
+
+    analysis_max_concurrency: Optional[int] = Field(
+        default=None,
+        ge=1,
+        env="ANALYSIS_MAX_CONCURRENCY",
+        description="Batches run on the engine at once (defaults to the engine's own limit)"
+    )
+
+    analysis_timeout: float = Field(
+        default=60.0,
+        gt=0,
+        env="ANALYSIS_TIMEOUT",
+        description="HTTP timeout for the local (image download) and remote engines"
+    )
+
+    analysis_stub_latency: float = Field(
+        default=2.0,
+        ge=0,
+        env="ANALYSIS_STUB_LATENCY",
+        description="Seconds the stub engine takes per inference call"
+    )
+
+    analysis_local_model: Optional[str] = Field(
+        default=None,
+        env="ANALYSIS_LOCAL_MODEL",
+        description="'package.module:function' predicting a list of image bytes (local engine)"
+    )
+
+    analysis_remote_url: Optional[str] = Field(
+        default=None,
+        env="ANALYSIS_REMOTE_URL",
+        description="Batch inference endpoint (remote engine)"
+    )
+
+    analysis_remote_api_key: Optional[str] = Field(
+        default=None,
+        env="ANALYSIS_REMOTE_API_KEY",
+        description="Bearer token for the remote engine"
+    )
+
+    # Image preprocessing (validation, metadata stripping, derivatives)
+    image_preprocessing: bool = Field(
+        default=False,
+        env="IMAGE_PREPROCESSING",
+        description="Validate image uploads and store a downscaled analysis copy and thumbnails"
+    )
+
+    image_workers: int = Field(
+        default=2,
+        ge=1,
+        env="IMAGE_WORKERS",
+        description="Processes in the image preprocessing pool"
+    )
+
+    image_analysis_max_side: int = Field(
+        default=1024,
+        ge=64,
+        env="IMAGE_ANALYSIS_MAX_SIDE",
+        description="Longest side in pixels of the copy sent to analysis"
+    )
+
+    image_thumbnail_sizes: List[int] = Field(
+        default=[256],
+        env="IMAGE_THUMBNAIL_SIZES",
+        description="Longest side in pixels of each thumbnail (JSON list)"
+    )
+
+    image_jpeg_quality: int = Field(
+        default=85,
+        ge=1,
+        le=95,
+        env="IMAGE_JPEG_QUALITY",
+        description="JPEG quality of the derivatives"
+    )
+
+    # Analysis result cache (keyed by image SHA-256)
+    analysis_cache_size: int = Field(
+        default=1024,
+        ge=1,
+        env="ANALYSIS_CACHE_SIZE",
+        description="Maximum analysis results kept in memory (LRU)"
+    )
+
+    analysis_cache_ttl: float = Field(
+        default=7 * 24 * 3600,
+        gt=0,
+        env="ANALYSIS_CACHE_TTL",
+        description="Seconds a cached analysis result stays valid"
+    )
+
+    analysis_cache_path: Optional[str] = Field(
+        default=None,
+        env="ANALYSIS_CACHE_PATH",
+        description="SQLite file for the persistent cache tier (disabled when unset)"
+    )
+
+    # Scan read response cache (GET /scans/{id}, /scans/{id}/analysis)
+    scan_cache_size: int = Field(
+        default=4096,
+        ge=1,
+        env="SCAN_CACHE_SIZE",
+        description="Maximum serialized scan responses kept in memory (LRU)"
+    )
+
+    scan_cache_ttl: float = Field(
+        default=24 * 3600,
+        gt=0,
+        env="SCAN_CACHE_TTL",
+        description="Seconds a cached scan response stays valid"
+    )
+
+    scan_http_max_age: int = Field(
+        default=300,
+        ge=0,
+        env="SCAN_HTTP_MAX_AGE",
+        description="Cache-Control max-age sent with scan reads; clients revalidate with If-None-Match after it"
+    )
+
+    cache_redis_url: Optional[str] = Field(
+        default=None,
+        env="CACHE_REDIS_URL",
+        description="Redis URL of a shared scan response cache tier (needs the redis package; disabled when unset)"
+    )
+
+    # Background job settings (async upload mode)
+    job_queue_backend: str = Field(
+        default="memory",
+        env="JOB_QUEUE_BACKEND",
+        description="Job queue implementation: 'memory' or 'sqlite'"
+    )
+
+    job_queue_path: str = Field(
+        default="jobs.db",
+        env="JOB_QUEUE_PATH",
+        description="SQLite file used by the 'sqlite' job queue"
+    )
+
+    job_workers: int = Field(
+        default=4,
+        ge=1,
+        env="JOB_WORKERS",
+        description="Number of concurrent background job workers"
+    )
+
+    job_queue_max_depth: int = Field(
+        default=100,
+        ge=1,
+        env="JOB_QUEUE_MAX_DEPTH",
+        description="Maximum number of queued jobs before uploads are rejected"
+    )
+
+    job_lease_timeout: float = Field(
+        default=30.0,
+        ge=1,
+        env="JOB_LEASE_TIMEOUT",
+        description="Seconds a process's claim on a sqlite-queue job lasts without renewal; "
+                    "jobs of a process that stops renewing are re-queued by the others"
+    )
+
+    job_retention: float = Field(
+        default=3600.0,
+        ge=0,
+        env="JOB_RETENTION",
+        description="Seconds a succeeded or failed job (and its result) stays queryable; direct uploads "
+                    "never completed are dropped this long after DIRECT_UPLOAD_EXPIRY"
+    )
+
+    # Job event streams (GET /events, /events/ws)
+    events_buffer_size: int = Field(
+        default=32,
+        ge=1,
+        env="EVENTS_BUFFER_SIZE",
+        description="Events buffered per subscriber; a slow subscriber loses the oldest first"
+    )
+
+    events_max_subscribers: int = Field(
+        default=10000,
+        ge=1,
+        env="EVENTS_MAX_SUBSCRIBERS",
+        description="Maximum open event streams per worker"
+    )
+
+    events_heartbeat_interval: float = Field(
+        default=15.0,
+        gt=0,
+        env="EVENTS_HEARTBEAT_INTERVAL",
+        description="Seconds between keep-alive messages on an idle event stream"
+    )
+
+    # Write-behind scan inserts (requires add_scan_uid.sql)
+    scan_write_behind: bool = Field(
+        default=False,
+        env="SCAN_WRITE_BEHIND",
+        description="Buffer new scan rows and insert them in bulk; scan ids become client-generated UUIDs"
+    )
+
+    scan_write_batch_size: int = Field(
+        default=100,
+        ge=1,
+        env="SCAN_WRITE_BATCH_SIZE",
+        description="Buffered rows that trigger an immediate flush (and rows per bulk insert)"
+    )
+
+    scan_write_flush_interval: float = Field(
+        default=0.5,
+        gt=0,
+        env="SCAN_WRITE_FLUSH_INTERVAL",
+        description="Maximum seconds a buffered row waits before it is flushed"
+    )
+
+    scan_write_log_dir: str = Field(
+        default="scan_write_log",
+        env="SCAN_WRITE_LOG_DIR",
+        description="Directory of the append-only log of unflushed rows, replayed on restart"
+    )
+
+    scan_write_fsync: bool = Field(
+        default=True,
+        env="SCAN_WRITE_FSYNC",
+        description="fsync the log before acknowledging a buffered row (off trades durability for latency)"
+    )
+
     class Config:
         """Pydantic config."""
         env_file = ".env"
         env_file_encoding = "utf-8"
-        case_sensitive = True  # Keep case sensitive for field names
+        case_sensitive = False  # Match upper-case env vars (e.g. MAX_UPLOAD_BYTES) to lower-case fields
         extra = "ignore"
 
 
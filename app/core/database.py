@@ -1,30 +1,130 @@
-"""Supabase database client initialization."""
-from supabase import create_client, Client
+"""
+Supabase database client initialization.
+
+The supabase and httpx packages are imported on first use rather than at
+import time: they dominate cold-start time and no request needs them until
+it touches storage or the database.
+"""
+from __future__ import annotations
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar, TYPE_CHECKING
 from app.core.config import settings
 import sys
 
-# Initialize the client globally ONCE
-try:
-    _db_client: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
-except Exception as e:
-    error_msg = str(e)
-    if "getaddrinfo failed" in error_msg or "11001" in error_msg:
-        print("\n" + "="*60)
-        print("ERROR: Cannot connect to Supabase!")
-        print("="*60)
-        print(f"URL: {settings.SUPABASE_URL}")
-        print("\nPossible issues:")
-        print("1. Check your internet connection")
-        print("2. Verify Supabase URL is correct")
-        print("3. Check if project exists: https://supabase.com/dashboard")
-        print("4. Check firewall/proxy settings")
-        print("5. Try: ping supabase.co")
-        print("="*60 + "\n")
-    raise
+if TYPE_CHECKING:
+    import httpx
+    from supabase import Client
+
+T = TypeVar("T")
+
+# Single shared client; created by init_db() on first use (warmed up from the app lifespan)
+_db_client: Optional[Client] = None
+_http_client: Optional[httpx.Client] = None
+_init_lock = threading.Lock()
+
+
+def _create_http_client() -> httpx.Client:
+    """Pooled keep-alive HTTP client shared by the storage and PostgREST clients."""
+    import httpx
+
+    return httpx.Client(
+        http2=settings.supabase_http2,
+        follow_redirects=True,
+        limits=httpx.Limits(
+            max_connections=settings.supabase_max_connections,
+            max_keepalive_connections=settings.supabase_max_keepalive_connections,
+            keepalive_expiry=settings.supabase_keepalive_expiry
+        ),
+        timeout=httpx.Timeout(
+            connect=settings.supabase_connect_timeout,
+            read=settings.supabase_read_timeout,
+            write=settings.supabase_write_timeout,
+            pool=settings.supabase_pool_timeout
+        )
+    )
+
+
+def init_db() -> Client:
+    """
+    Create the shared Supabase client (idempotent and thread-safe).
+    Called on first use, or ahead of time by the lifespan warm-up.
+    No network connection is made here; the pool connects on the first call.
+    """
+    global _db_client, _http_client
+    with _init_lock:
+        if _db_client is not None:
+            return _db_client
+        try:
+            from supabase import create_client
+            from supabase.lib.client_options import SyncClientOptions
+
+            _http_client = _create_http_client()
+            _db_client = create_client(
+                settings.SUPABASE_URL,
+                settings.SUPABASE_KEY,
+                options=SyncClientOptions(httpx_client=_http_client)
+            )
+        except Exception as e:
+            error_msg = str(e)
+            if "getaddrinfo failed" in error_msg or "11001" in error_msg:
+                print("\n" + "="*60)
+                print("ERROR: Cannot connect to Supabase!")
+                print("="*60)
+                print(f"URL: {settings.SUPABASE_URL}")
+                print("\nPossible issues:")
+                print("1. Check your internet connection")
+                print("2. Verify Supabase URL is correct")
+                print("3. Check if project exists: https://supabase.com/dashboard")
+                print("4. Check firewall/proxy settings")
+                print("5. Try: ping supabase.co")
+                print("="*60 + "\n")
+            raise
+    return _db_client
+
+
+def close_db() -> None:
+    """Close the shared client's HTTP connection pool."""
+    global _db_client, _http_client
+    if _http_client is not None:
+        _http_client.close()
+    _db_client = None
+    _http_client = None
+
+
+def is_db_initialized() -> bool:
+    """Whether the shared client has been created (used by the readiness probe)."""
+    return _db_client is not None
+
 
 def get_db() -> Client:
     """
-    Returns the Supabase client.
+    Returns the shared Supabase client (also usable as a FastAPI dependency).
     This is NOT async, to prevent 'coroutine' errors.
     """
-    return _db_client
\ No newline at end of file
+    return _db_client or init_db()
+
+
+# Bounded pool for the blocking Supabase HTTP calls, so they never run on the event loop
+_db_executor = ThreadPoolExecutor(
+    max_workers=settings.db_executor_workers,
+    thread_name_prefix="supabase-io"
+)
+
+
+async def run_db(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run a blocking Supabase call in the database thread pool.
+
+    Use this for every storage/table call made from an async handler, e.g.
+    ``await run_db(query.execute)``, so a slow request cannot stall the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_db_executor, functools.partial(func, *args, **kwargs))
+
+
+def shutdown_db_executor() -> None:
+    """Wait for in-flight Supabase calls and stop the database thread pool."""
+    _db_executor.shutdown(wait=True)
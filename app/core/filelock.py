@@ -0,0 +1,41 @@
+"""
+Non-blocking advisory locks on open files, on POSIX and Windows.
+
+POSIX uses flock, which also supports shared locks. Windows uses
+msvcrt.locking on the first byte of the file; it has no shared mode, so a
+shared lock is exclusive there. On both, a lock belongs to the open file and
+is dropped when it is closed or the process exits, so a crashed holder never
+leaves a stale lock behind.
+"""
+import os
+
+if os.name == "nt":
+    import msvcrt
+
+    def try_lock(fd: int, shared: bool = False) -> bool:
+        """Lock fd without waiting; False if another open file holds a conflicting lock."""
+        os.lseek(fd, 0, os.SEEK_SET)
+        try:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        except OSError:
+            return False
+        return True
+
+    def unlock(fd: int) -> None:
+        """Release a lock taken with try_lock()."""
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def try_lock(fd: int, shared: bool = False) -> bool:
+        """Lock fd without waiting; False if another open file holds a conflicting lock."""
+        try:
+            fcntl.flock(fd, (fcntl.LOCK_SH if shared else fcntl.LOCK_EX) | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        return True
+
+    def unlock(fd: int) -> None:
+        """Release a lock taken with try_lock()."""
+        fcntl.flock(fd, fcntl.LOCK_UN)
@@ -0,0 +1,106 @@
+"""Prometheus metrics for request rates, pipeline stage latencies and errors."""
+import time
+from contextlib import contextmanager
+from typing import Iterator
+from prometheus_client import Counter, Gauge, Histogram
+
+# Upload/analysis stages take from milliseconds to tens of seconds
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 3, 5, 10, 30, 60)
+
+HTTP_REQUESTS = Counter(
+    "rheumalens_http_requests_total",
+    "HTTP requests by method, route and status code",
+    ["method", "route", "status"]
+)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "rheumalens_http_request_duration_seconds",
+    "HTTP request latency by method and route",
+    ["method", "route"],
+    buckets=_LATENCY_BUCKETS
+)
+
+HTTP_IN_FLIGHT = Gauge(
+    "rheumalens_http_requests_in_flight",
+    "HTTP requests currently being handled"
+)
+
+STAGE_DURATION = Histogram(
+    "rheumalens_stage_duration_seconds",
+    "Latency of upload pipeline stages",
+    ["stage"],
+    buckets=_LATENCY_BUCKETS
+)
+
+STAGE_ERRORS = Counter(
+    "rheumalens_stage_errors_total",
+    "Failures of upload pipeline stages by exception type",
+    ["stage", "error"]
+)
+
+JOB_QUEUE_DEPTH = Gauge(
+    "rheumalens_job_queue_depth",
+    "Background jobs waiting for a worker"
+)
+
+ANALYSIS_PENDING = Gauge(
+    "rheumalens_analysis_pending",
+    "Analysis requests waiting to be batched"
+)
+
+SCAN_WRITES_PENDING = Gauge(
+    "rheumalens_scan_writes_pending",
+    "Scan rows logged by the write-behind buffer but not yet inserted"
+)
+
+EVENT_SUBSCRIBERS = Gauge(
+    "rheumalens_event_subscribers",
+    "Open job event streams (SSE and WebSocket)"
+)
+
+EVENTS_DROPPED = Counter(
+    "rheumalens_events_dropped_total",
+    "Job events dropped because a subscriber's buffer was full"
+)
+
+DEPENDENCY_CALLS = Counter(
+    "rheumalens_dependency_calls_total",
+    "Outbound calls by dependency and outcome "
+    "(success, error, timeout, rejected, short_circuited)",
+    ["dependency", "outcome"]
+)
+
+DEPENDENCY_RETRIES = Counter(
+    "rheumalens_dependency_retries_total",
+    "Retried outbound calls by dependency",
+    ["dependency"]
+)
+
+DEPENDENCY_IN_FLIGHT = Gauge(
+    "rheumalens_dependency_in_flight",
+    "Outbound calls holding a bulkhead slot",
+    ["dependency"]
+)
+
+CIRCUIT_STATE = Gauge(
+    "rheumalens_circuit_state",
+    "Circuit breaker state per dependency (0 closed, 1 half-open, 2 open)",
+    ["dependency"]
+)
+
+
+@contextmanager
+def observe_stage(stage: str) -> Iterator[None]:
+    """
+    Time a pipeline stage (parse, storage_upload, preprocess, analysis, db_insert).
+
+    Records the duration in STAGE_DURATION and counts exceptions in STAGE_ERRORS.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        STAGE_ERRORS.labels(stage=stage, error=type(e).__name__).inc()
+        raise
+    finally:
+        STAGE_DURATION.labels(stage=stage).observe(time.perf_counter() - start)
@@ -0,0 +1,296 @@
+"""
+Resilience layer for outbound calls: timeouts, retries, circuit breakers and bulkheads.
+
+Every call to storage, the scans table or the analysis backend goes through
+the Dependency for that backend:
+
+* a bulkhead (semaphore) caps its calls in flight, so one slow backend
+  cannot take the threads/connections another one needs; a timed-out call
+  running in a thread keeps its slot until the thread is done with it;
+* a circuit breaker opens after consecutive transient failures and then
+  fails fast with DependencyUnavailableError until a trial call succeeds;
+* each attempt is bounded by a timeout;
+* idempotent calls are retried with exponential backoff and full jitter.
+"""
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.core.metrics import CIRCUIT_STATE, DEPENDENCY_CALLS, DEPENDENCY_IN_FLIGHT, DEPENDENCY_RETRIES
+
+T = TypeVar("T")
+
+logger = get_logger(__name__)
+
+# Dependency names (also the "dependency" metric label)
+STORAGE = "storage"
+DATABASE = "database"
+ANALYSIS = "analysis"
+
+# Circuit states (also the value of the rheumalens_circuit_state gauge)
+CLOSED = 0
+HALF_OPEN = 1
+OPEN = 2
+
+# SQLSTATE classes / PostgREST codes that mean "database unreachable or overloaded"
+_TRANSIENT_DB_CODES = ("08", "40", "53", "57", "PGRST00")
+
+
+class DependencyUnavailableError(Exception):
+    """Raised when a dependency is failing fast, saturated or timed out (maps to 503)."""
+
+    def __init__(self, dependency: str, message: str, retry_after: float):
+        super().__init__(message)
+        self.dependency = dependency
+        self.retry_after = retry_after
+
+
+def is_transient(error: BaseException) -> bool:
+    """
+    Whether an error suggests the dependency itself is unhealthy.
+
+    Timeouts, connection errors, 429 and 5xx responses are transient; other
+    errors (bad requests, missing objects, constraint violations) mean the
+    dependency answered and are neither retried nor counted by the breaker.
+    """
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    import httpx
+
+    if isinstance(error, httpx.TransportError):
+        return True
+    # httpx.HTTPStatusError, storage3 StorageApiError, postgrest APIError
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None) or getattr(error, "status", None)
+    code = str(getattr(error, "code", "") or "")
+    if status is None and code.isdigit() and len(code) == 3:
+        status = code
+    try:
+        if status is not None and (int(status) == 429 or int(status) >= 500):
+            return True
+    except ValueError:
+        pass
+    return code.startswith(_TRANSIENT_DB_CODES)
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    Closed: calls pass. After failure_threshold transient failures in a row
+    it opens and rejects calls for reset_timeout seconds, then half-opens and
+    lets a single trial call through; its outcome closes or re-opens it.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._opened_at = 0.0
+        self._trial_started: Optional[float] = None
+        self._set_state(CLOSED)
+
+    def _set_state(self, state: int) -> None:
+        self.state = state
+        CIRCUIT_STATE.labels(dependency=self.name).set(state)
+
+    def allow(self) -> bool:
+        """Whether a call may proceed now."""
+        now = time.monotonic()
+        if self.state == OPEN and now - self._opened_at >= self.reset_timeout:
+            self._set_state(HALF_OPEN)
+        if self.state == CLOSED:
+            return True
+        # A trial that never reported back (e.g. cancelled) is replaced after reset_timeout
+        if self.state == HALF_OPEN and (
+            self._trial_started is None or now - self._trial_started >= self.reset_timeout
+        ):
+            self._trial_started = now
+            return True
+        return False
+
+    def retry_after(self) -> float:
+        """Seconds until the circuit lets a trial call through."""
+        if self.state != OPEN:
+            return 1.0
+        return max(1.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def record_success(self) -> None:
+        """The dependency answered (including with a non-transient error)."""
+        self.failures = 0
+        self._trial_started = None
+        if self.state != CLOSED:
+            logger.info("Circuit closed", extra={"dependency": self.name})
+            self._set_state(CLOSED)
+
+    def record_failure(self) -> None:
+        """The dependency failed with a transient error."""
+        self.failures += 1
+        self._trial_started = None
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != OPEN:
+                logger.warning("Circuit opened", extra={"dependency": self.name, "failures": self.failures})
+            self._opened_at = time.monotonic()
+            self._set_state(OPEN)
+
+
+class Dependency:
+    """
+    Timeout, retry, circuit breaker and bulkhead policy for one backend.
+
+    With threaded=True (calls run in the run_db thread pool) an attempt that
+    times out or is cancelled keeps its bulkhead slot until its thread
+    finishes: the thread cannot be stopped, so freeing the slot early would
+    let a stalled backend take every thread in the shared pool.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        timeout: float,
+        retries: int,
+        max_concurrency: int,
+        breaker: CircuitBreaker,
+        max_wait: float,
+        backoff_base: float,
+        backoff_max: float,
+        threaded: bool = False
+    ):
+        self.name = name
+        self.timeout = timeout
+        self.retries = retries
+        self.breaker = breaker
+        self.max_wait = max_wait
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.threaded = threaded
+        self._slots = asyncio.Semaphore(max_concurrency)
+
+    def _backoff(self, retry: int) -> float:
+        # Full jitter: spreads out retries from many callers after a shared failure
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** retry))
+
+    async def _acquire_slot(self) -> None:
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.max_wait)
+        except asyncio.TimeoutError:
+            DEPENDENCY_CALLS.labels(dependency=self.name, outcome="rejected").inc()
+            raise DependencyUnavailableError(
+                self.name, f"Too many concurrent {self.name} calls; try again later", retry_after=1.0
+            )
+
+    def _finish_abandoned(self, attempt: asyncio.Future) -> None:
+        if not attempt.cancelled():
+            attempt.exception()  # retrieved, so it is not logged as never retrieved
+        DEPENDENCY_IN_FLIGHT.labels(dependency=self.name).dec()
+        self._slots.release()
+
+    async def call(self, func: Callable[[], Awaitable[T]], idempotent: bool = True) -> T:
+        """
+        Run func() under this dependency's policy.
+
+        Args:
+            func: Creates the awaitable for one attempt (called again on retry)
+            idempotent: Whether the call may safely be repeated
+
+        Returns:
+            The result of func()
+
+        Raises:
+            DependencyUnavailableError: Circuit open, bulkhead full, or the
+                last attempt timed out or failed with a transient error
+            Exception: Non-transient errors from func, unchanged
+        """
+        attempts = 1 + (self.retries if idempotent else 0)
+        for attempt in range(attempts):
+            if attempt:
+                DEPENDENCY_RETRIES.labels(dependency=self.name).inc()
+                await asyncio.sleep(self._backoff(attempt - 1))
+
+            await self._acquire_slot()
+            handed_off = False
+            try:
+                if not self.breaker.allow():
+                    DEPENDENCY_CALLS.labels(dependency=self.name, outcome="short_circuited").inc()
+                    raise DependencyUnavailableError(
+                        self.name,
+                        f"{self.name.capitalize()} is unavailable; try again later",
+                        retry_after=self.breaker.retry_after()
+                    )
+                DEPENDENCY_IN_FLIGHT.labels(dependency=self.name).inc()
+                attempt_future = asyncio.ensure_future(func())
+                try:
+                    # Shielded, a timeout abandons the attempt instead of
+                    # cancelling it: cancelling cannot stop its thread anyway
+                    awaited = asyncio.shield(attempt_future) if self.threaded else attempt_future
+                    result = await asyncio.wait_for(awaited, self.timeout)
+                finally:
+                    if attempt_future.done():
+                        DEPENDENCY_IN_FLIGHT.labels(dependency=self.name).dec()
+                    else:
+                        # Still running: its slot is released when it finishes
+                        attempt_future.add_done_callback(self._finish_abandoned)
+                        handed_off = True
+            except DependencyUnavailableError:
+                raise
+            except Exception as e:
+                if not is_transient(e):
+                    self.breaker.record_success()
+                    DEPENDENCY_CALLS.labels(dependency=self.name, outcome="error").inc()
+                    raise
+                self.breaker.record_failure()
+                timed_out = isinstance(e, asyncio.TimeoutError)
+                DEPENDENCY_CALLS.labels(
+                    dependency=self.name, outcome="timeout" if timed_out else "error"
+                ).inc()
+                logger.warning(
+                    "%s call failed: %s", self.name, e or type(e).__name__,
+                    extra={"dependency": self.name, "attempt": attempt + 1, "attempts": attempts}
+                )
+                if attempt + 1 < attempts:
+                    continue
+                reason = f"timed out after {self.timeout}s" if timed_out else f"failed: {e}"
+                raise DependencyUnavailableError(
+                    self.name, f"{self.name.capitalize()} {reason}", retry_after=self.breaker.retry_after()
+                ) from e
+            else:
+                self.breaker.record_success()
+                DEPENDENCY_CALLS.labels(dependency=self.name, outcome="success").inc()
+                return result
+            finally:
+                if not handed_off:
+                    self._slots.release()
+
+
+def _create_dependency(name: str) -> Dependency:
+    timeout, retries, max_concurrency = {
+        STORAGE: (settings.storage_timeout, settings.storage_retries, settings.storage_max_concurrency),
+        DATABASE: (settings.db_timeout, settings.db_retries, settings.db_max_concurrency),
+        ANALYSIS: (settings.analysis_timeout, settings.analysis_retries, settings.analysis_max_pending),
+    }[name]
+    return Dependency(
+        name,
+        timeout=timeout,
+        retries=retries,
+        max_concurrency=max_concurrency,
+        breaker=CircuitBreaker(name, settings.circuit_failure_threshold, settings.circuit_reset_timeout),
+        max_wait=settings.bulkhead_max_wait,
+        backoff_base=settings.retry_backoff_base,
+        backoff_max=settings.retry_backoff_max,
+        # Storage and table calls run in the run_db thread pool
+        threaded=name in (STORAGE, DATABASE)
+    )
+
+
+_dependencies: Dict[str, Dependency] = {}
+
+
+def get_dependency(name: str) -> Dependency:
+    """Returns the process-wide policy for a dependency (STORAGE, DATABASE, ANALYSIS)."""
+    dependency: Optional[Dependency] = _dependencies.get(name)
+    if dependency is None:
+        dependency = _dependencies[name] = _create_dependency(name)
+    return dependency
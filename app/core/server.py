@@ -0,0 +1,63 @@
+"""
+Production entry point: run the API under uvicorn configured from Settings.
+
+With one worker the app is imported here and served in this process. With
+several, uvicorn binds the socket once and supervises SERVER_WORKERS
+processes sharing it (restarting any that die); workers are spawned, not
+forked, so each imports the app itself. Forking a pre-loaded app would share
+its memory, but the Supabase client, thread pools and logging thread are
+not fork-safe once created, so the app is only imported here first to fail
+fast on import or configuration errors instead of crash-looping N workers.
+
+Per-process state stays per worker: the in-memory job queue, job events,
+caches and /metrics. With the default memory job queue a job can only be
+polled or completed on the worker that created it (other workers return
+404), so run several workers with JOB_QUEUE_BACKEND=sqlite, whose jobs are
+claimed under a lease and run once, and a shared CACHE_REDIS_URL.
+"""
+import importlib
+import os
+from app.core.config import settings
+
+APP_IMPORT_STRING = "main:app"
+
+
+def resolve_workers(workers: int) -> int:
+    """SERVER_WORKERS, with 0 meaning one worker per CPU core available to this process."""
+    if workers:
+        return workers
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS / Windows
+        return os.cpu_count() or 1
+
+
+def serve() -> None:
+    """Run the API until SIGINT / SIGTERM, then shut down gracefully."""
+    import uvicorn
+
+    workers = resolve_workers(settings.server_workers)
+    # Reload watches files from a supervisor process, so it is single-worker only
+    reload = settings.debug and workers == 1
+    module_name, _, attribute = APP_IMPORT_STRING.partition(":")
+    app = getattr(importlib.import_module(module_name), attribute)
+
+    uvicorn.run(
+        APP_IMPORT_STRING if workers > 1 or reload else app,
+        host=settings.server_host,
+        port=settings.server_port,
+        workers=workers,
+        reload=reload,
+        loop=settings.server_loop,
+        http=settings.server_http,
+        backlog=settings.server_backlog,
+        timeout_keep_alive=settings.server_keepalive_timeout,
+        limit_concurrency=settings.server_limit_concurrency,
+        timeout_graceful_shutdown=settings.server_graceful_timeout,
+        access_log=settings.server_access_log,
+        log_level=settings.log_level.lower(),
+    )
+
+
+if __name__ == "__main__":
+    serve()
@@ -1,6 +1,6 @@
 """Pydantic models for request/response schemas."""
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, List
 from pydantic import BaseModel, Field, field_validator
 
 
@@ -26,6 +26,22 @@ class ScanCreate(BaseModel):
         }
 
 
+class AnalysisResult(BaseModel):
+    """AI analysis of one scan. Engines may return fields beyond these; they are kept as-is."""
+
+    confidence: Optional[float] = Field(None, description="Model confidence")
+    diagnosis: Optional[str] = Field(None, description="Predicted diagnosis")
+    severity: Optional[str] = Field(None, description="Predicted severity")
+    affected_joints: List[str] = Field(default_factory=list, description="Joints showing findings")
+    analysis_date: Optional[datetime] = Field(None, description="When the analysis ran")
+    image_url: Optional[str] = Field(None, description="Image the analysis ran on")
+    recommendations: List[str] = Field(default_factory=list, description="Suggested next steps")
+
+    class Config:
+        """Pydantic config."""
+        extra = "allow"
+
+
 class ScanResponse(BaseModel):
     """Schema for scan response."""
     
@@ -33,8 +49,11 @@ class ScanResponse(BaseModel):
     patient_name: str = Field(..., description="Patient's full name")
     age: int = Field(..., description="Patient's age")
     image_url: str = Field(..., description="Public URL of the uploaded scan image")
-    analysis_result: Dict[str, Any] = Field(..., description="AI analysis results")
+    analysis_result: AnalysisResult = Field(..., description="AI analysis results")
     created_at: datetime = Field(..., description="Scan creation timestamp")
+    derivatives: Optional[Dict[str, str]] = Field(
+        None, description="URLs of the analysis copy and thumbnails (when preprocessing is enabled)"
+    )
     
     class Config:
         """Pydantic config."""
@@ -55,6 +74,140 @@ class ScanResponse(BaseModel):
         }
 
 
+class ScanSummary(BaseModel):
+    """Schema for a scan in a list; the full analysis is only included on request."""
+
+    id: str = Field(..., description="Scan ID")
+    patient_name: str = Field(..., description="Patient's full name")
+    age: int = Field(..., description="Patient's age")
+    image_url: str = Field(..., description="Public URL of the uploaded scan image")
+    created_at: datetime = Field(..., description="Scan creation timestamp")
+    diagnosis: Optional[str] = Field(None, description="Diagnosis from the analysis")
+    severity: Optional[str] = Field(None, description="Severity from the analysis")
+    derivatives: Optional[Dict[str, str]] = Field(None, description="URLs of the analysis copy and thumbnails")
+    analysis_result: Optional[AnalysisResult] = Field(
+        None, description="Full AI analysis (only with include_analysis=true)"
+    )
+
+
+class ScanPage(BaseModel):
+    """Schema for a page of scans."""
+
+    items: List[ScanSummary] = Field(..., description="Scans, newest first")
+    next_cursor: Optional[str] = Field(None, description="Pass as cursor to fetch the next page; null on the last page")
+
+
+class BatchItemResult(BaseModel):
+    """Outcome of one file in a batch upload."""
+
+    index: int = Field(..., description="Position of the file in the request")
+    filename: Optional[str] = Field(None, description="Uploaded file name")
+    scan: Optional[ScanResponse] = Field(None, description="Saved scan, if the item succeeded")
+    error: Optional[str] = Field(None, description="Error message, if the item failed")
+
+
+class BatchUploadResponse(BaseModel):
+    """Schema for batch upload response."""
+
+    succeeded: int = Field(..., description="Number of scans saved")
+    failed: int = Field(..., description="Number of files that failed")
+    results: List[BatchItemResult] = Field(..., description="Per-file results, in request order")
+
+
+class JobResponse(BaseModel):
+    """Schema for a background scan processing job."""
+
+    id: str = Field(..., description="Job ID")
+    status: str = Field(..., description="awaiting_upload, queued, running, succeeded or failed")
+    stage: str = Field(..., description="Current pipeline stage (stored, analyzing, analyzed, saving, done)")
+    result: Optional[ScanResponse] = Field(None, description="Saved scan once the job has succeeded")
+    error: Optional[str] = Field(None, description="Error message if the job failed")
+    created_at: datetime = Field(..., description="Job creation timestamp")
+    updated_at: datetime = Field(..., description="Last status change timestamp")
+
+    class Config:
+        """Pydantic config."""
+        from_attributes = True
+        json_schema_extra = {
+            "example": {
+                "id": "3f2b8c1e9a7d4e6f8b0c2d4e6f8a0b1c",
+                "status": "running",
+                "stage": "analyzing",
+                "result": None,
+                "error": None,
+                "created_at": "2024-01-15T10:30:00Z",
+                "updated_at": "2024-01-15T10:30:01Z"
+            }
+        }
+
+
+class UploadInitRequest(BaseModel):
+    """Schema for starting a direct-to-storage upload."""
+
+    patient_name: str = Field(..., min_length=1, max_length=255, description="Patient's full name")
+    age: int = Field(..., ge=0, le=150, description="Patient's age")
+    filename: str = Field(..., min_length=1, max_length=255, description="Original file name")
+    content_type: str = Field("image/jpeg", max_length=255, description="MIME type the file will be uploaded with")
+    size: Optional[int] = Field(None, ge=0, description="File size in bytes, if known (checked against the upload limit)")
+
+    class Config:
+        """Pydantic config."""
+        json_schema_extra = {
+            "example": {
+                "patient_name": "John Doe",
+                "age": 45,
+                "filename": "hand_xray.jpg",
+                "content_type": "image/jpeg",
+                "size": 4194304
+            }
+        }
+
+
+class UploadInitResponse(BaseModel):
+    """Signed URL the client uploads the file to before calling complete."""
+
+    id: str = Field(..., description="Upload id (also the id of its job)")
+    upload_url: str = Field(..., description="Signed storage URL; PUT the file here")
+    token: str = Field(..., description="Upload token contained in upload_url")
+    path: str = Field(..., description="Object path inside the storage bucket")
+    complete_url: str = Field(..., description="POST here once the file is uploaded")
+    expires_at: datetime = Field(..., description="Complete the upload before this time")
+
+
+class ResumableUploadCreate(BaseModel):
+    """Schema for starting a resumable upload."""
+
+    patient_name: str = Field(..., min_length=1, max_length=255, description="Patient's full name")
+    age: int = Field(..., ge=0, le=150, description="Patient's age")
+    filename: str = Field(..., min_length=1, max_length=255, description="Original file name")
+    content_type: str = Field("image/jpeg", max_length=255, description="MIME type of the file")
+    size: int = Field(..., ge=1, description="Total file size in bytes")
+
+    class Config:
+        """Pydantic config."""
+        json_schema_extra = {
+            "example": {
+                "patient_name": "John Doe",
+                "age": 45,
+                "filename": "hand_study.dcm",
+                "content_type": "application/dicom",
+                "size": 367001600
+            }
+        }
+
+
+class ResumableUploadStatus(BaseModel):
+    """Progress of a resumable upload."""
+
+    id: str = Field(..., description="Upload session id")
+    size: int = Field(..., description="Declared file size in bytes")
+    received: List[List[int]] = Field(..., description="Received byte ranges as [start, end) pairs")
+    received_bytes: int = Field(..., description="Total bytes received")
+    complete: bool = Field(..., description="Whether every byte has been received")
+    chunk_size: int = Field(..., description="Suggested chunk size in bytes")
+    expires_at: datetime = Field(..., description="Finalize before this time")
+
+
 class PatientData(BaseModel):
     """Schema for patient data in upload request."""
     
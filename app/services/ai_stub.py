@@ -1,23 +1,18 @@
 """AI analysis stub service (mocks Azure analysis)."""
-import asyncio
 from typing import Dict, Any
 from datetime import datetime
 
 
-async def analyze_scan(image_url: str) -> Dict[str, Any]:
+def mock_analysis(image_url: str) -> Dict[str, Any]:
     """
-    Mock AI analysis function that simulates Azure analysis.
+    Build the dummy analysis result for one image.
     
     Args:
-        image_url: URL of the image to analyze
+        image_url: URL of the analysed image
         
     Returns:
         Dictionary containing mock analysis results
     """
-    # Simulate processing time (2 seconds)
-    await asyncio.sleep(2)
-    
-    # Return dummy analysis results
     return {
         "confidence": 0.85,
         "diagnosis": "Rheumatoid Arthritis",
@@ -31,9 +26,3 @@ async def analyze_scan(image_url: str) -> Dict[str, Any]:
             "Monitor joint mobility"
         ]
     }
-
-
-
-
-
-
@@ -0,0 +1,282 @@
+"""Pluggable AI analysis engines and the micro-batching scheduler in front of them."""
+from __future__ import annotations
+import asyncio
+import importlib
+import os
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Dict, Any, List, Optional, Tuple, Callable, TYPE_CHECKING
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.services.ai_stub import mock_analysis
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = get_logger(__name__)
+
+
+class AnalysisEngine(ABC):
+    """
+    Interface for analysis backends.
+
+    Engines always receive a batch of image URLs and return one result per
+    URL, in order; a batch of one is the unbatched case.
+    """
+
+    name: str = "engine"
+    # Batches an engine can run at the same time (overridable in settings)
+    default_concurrency: int = 4
+
+    async def start(self) -> None:
+        """Acquire resources (HTTP clients, model weights)."""
+
+    async def close(self) -> None:
+        """Release resources."""
+
+    @abstractmethod
+    async def analyze_batch(self, image_urls: List[str]) -> List[Dict[str, Any]]:
+        """Analyse a batch of images in one inference call."""
+
+
+class StubAnalysisEngine(AnalysisEngine):
+    """Mock engine: one fixed delay per inference call, regardless of batch size."""
+
+    name = "stub"
+    # Sleeping costs nothing, so only bound it loosely
+    default_concurrency = 32
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    async def analyze_batch(self, image_urls: List[str]) -> List[Dict[str, Any]]:
+        await asyncio.sleep(self.latency)
+        return [mock_analysis(url) for url in image_urls]
+
+
+class LocalModelEngine(AnalysisEngine):
+    """
+    Runs a CPU model in-process.
+
+    The model is a ``"package.module:function"`` callable taking a list of
+    image bytes and returning one result dict per image. It runs in a worker
+    thread so inference does not block the event loop.
+    """
+
+    name = "local"
+    default_concurrency = os.cpu_count() or 1
+
+    def __init__(self, model_path: str, timeout: float):
+        module_name, _, func_name = model_path.partition(":")
+        self._predict: Callable[[List[bytes]], List[Dict[str, Any]]] = getattr(
+            importlib.import_module(module_name), func_name
+        )
+        self._timeout = timeout
+        self._http: Optional[httpx.AsyncClient] = None
+
+    async def start(self) -> None:
+        import httpx
+
+        self._http = httpx.AsyncClient(timeout=self._timeout)
+
+    async def close(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+
+    async def _download(self, url: str) -> bytes:
+        response = await self._http.get(url)
+        response.raise_for_status()
+        return response.content
+
+    async def analyze_batch(self, image_urls: List[str]) -> List[Dict[str, Any]]:
+        images = await asyncio.gather(*(self._download(url) for url in image_urls))
+        results = await asyncio.to_thread(self._predict, list(images))
+        if len(results) != len(image_urls):
+            raise Exception(f"Model returned {len(results)} results for {len(image_urls)} images")
+        return [dict(result, image_url=url) for url, result in zip(image_urls, results)]
+
+
+class RemoteAnalysisEngine(AnalysisEngine):
+    """
+    Calls a remote inference service.
+
+    Sends ``POST {"image_urls": [...]}`` and expects ``{"results": [...]}``
+    with one result per URL.
+    """
+
+    name = "remote"
+    default_concurrency = 8
+
+    def __init__(self, url: str, api_key: Optional[str], timeout: float):
+        self._url = url
+        self._headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self._timeout = timeout
+        self._http: Optional[httpx.AsyncClient] = None
+
+    async def start(self) -> None:
+        import httpx
+
+        self._http = httpx.AsyncClient(timeout=self._timeout, headers=self._headers)
+
+    async def close(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+
+    async def analyze_batch(self, image_urls: List[str]) -> List[Dict[str, Any]]:
+        response = await self._http.post(self._url, json={"image_urls": image_urls})
+        response.raise_for_status()
+        results = response.json()["results"]
+        if len(results) != len(image_urls):
+            raise Exception(
+                f"Analysis service returned {len(results)} results for {len(image_urls)} images"
+            )
+        return results
+
+
+class MicroBatchScheduler:
+    """
+    Gathers concurrent analysis requests into micro-batches.
+
+    A batch is dispatched when it reaches max_batch_size or when max_wait
+    seconds have passed since its first request, whichever comes first. At
+    most max_concurrency batches run on the engine at once; while all slots
+    are busy, new requests keep queueing and form the next, fuller batch.
+    """
+
+    def __init__(self, engine: AnalysisEngine, max_batch_size: int, max_wait: float, max_concurrency: int):
+        self.engine = engine
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_concurrency = max_concurrency
+        self._pending: "deque[Tuple[str, asyncio.Future]]" = deque()
+        self._arrived = asyncio.Event()
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._runner: Optional[asyncio.Task] = None
+        self._batches: set = set()
+        self.batches_dispatched = 0
+        self.items_dispatched = 0
+
+    async def start(self) -> None:
+        """Start the engine and the batching loop (idempotent)."""
+        if self._runner is None:
+            await self.engine.start()
+            self._runner = asyncio.create_task(self._run(), name="analysis-scheduler")
+
+    async def stop(self) -> None:
+        """Stop batching, wait for running batches and close the engine."""
+        if self._runner is not None:
+            self._runner.cancel()
+            await asyncio.gather(self._runner, return_exceptions=True)
+            self._runner = None
+        await asyncio.gather(*self._batches, return_exceptions=True)
+        while self._pending:
+            _, future = self._pending.popleft()
+            if not future.done():
+                future.set_exception(Exception("Analysis scheduler stopped"))
+        await self.engine.close()
+
+    async def analyze(self, image_url: str) -> Dict[str, Any]:
+        """Queue one image for analysis and wait for its result."""
+        await self.start()
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((image_url, future))
+        self._arrived.set()
+        return await future
+
+    def pending(self) -> int:
+        """Number of requests waiting to be batched."""
+        return len(self._pending)
+
+    async def _wait_for_request(self, timeout: Optional[float]) -> bool:
+        """Wait until a request is pending; False if the timeout expired first."""
+        while not self._pending:
+            self._arrived.clear()
+            try:
+                await asyncio.wait_for(self._arrived.wait(), timeout)
+            except asyncio.TimeoutError:
+                return bool(self._pending)
+        return True
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._slots.acquire()
+            await self._wait_for_request(None)
+
+            batch: List[Tuple[str, asyncio.Future]] = []
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                if self._pending:
+                    url, future = self._pending.popleft()
+                    if not future.done():  # caller may have gone away
+                        batch.append((url, future))
+                    continue
+                remaining = deadline - loop.time()
+                if remaining <= 0 or not await self._wait_for_request(remaining):
+                    break
+
+            if not batch:
+                self._slots.release()
+                continue
+            task = asyncio.create_task(self._dispatch(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _dispatch(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        self.batches_dispatched += 1
+        self.items_dispatched += len(batch)
+        try:
+            results = await self.engine.analyze_batch([url for url, _ in batch])
+        except Exception as e:
+            logger.error(
+                "Analysis batch failed: %s", e,
+                extra={"engine": self.engine.name, "batch_size": len(batch)}
+            )
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            # An engine that returned too few results must not leave callers
+            # waiting out the analysis timeout (which would also trip the breaker)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(Exception("Analysis returned no result for this image"))
+            self._slots.release()
+
+
+def create_analysis_engine() -> AnalysisEngine:
+    """Build the analysis engine configured in settings."""
+    if settings.analysis_engine == "remote":
+        if not settings.analysis_remote_url:
+            raise ValueError("ANALYSIS_REMOTE_URL is required for the 'remote' analysis engine")
+        return RemoteAnalysisEngine(
+            settings.analysis_remote_url,
+            settings.analysis_remote_api_key,
+            settings.analysis_timeout
+        )
+    if settings.analysis_engine == "local":
+        if not settings.analysis_local_model:
+            raise ValueError("ANALYSIS_LOCAL_MODEL is required for the 'local' analysis engine")
+        return LocalModelEngine(settings.analysis_local_model, settings.analysis_timeout)
+    return StubAnalysisEngine(settings.analysis_stub_latency)
+
+
+_scheduler: Optional[MicroBatchScheduler] = None
+
+
+def get_analysis_scheduler() -> MicroBatchScheduler:
+    """Returns the process-wide analysis scheduler, creating it on first use."""
+    global _scheduler
+    if _scheduler is None:
+        engine = create_analysis_engine()
+        _scheduler = MicroBatchScheduler(
+            engine,
+            max_batch_size=settings.analysis_max_batch_size,
+            max_wait=settings.analysis_max_wait_ms / 1000,
+            max_concurrency=settings.analysis_max_concurrency or engine.default_concurrency
+        )
+    return _scheduler
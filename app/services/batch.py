@@ -0,0 +1,88 @@
+"""Batch upload service: store and analyse many scans concurrently."""
+from __future__ import annotations
+import asyncio
+from typing import Dict, Any, List, Optional, Tuple, TYPE_CHECKING
+from fastapi import UploadFile
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.services.storage import upload_file_to_storage, digest_upload
+from app.services.imaging import preprocess_upload
+from app.services.scans import get_analysis, build_scan_row, save_scans
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+logger = get_logger(__name__)
+
+
+async def _store_and_analyze(
+    db: Client,
+    file: UploadFile,
+    patient_data: Dict[str, Any],
+    upload_slots: asyncio.Semaphore
+) -> Dict[str, Any]:
+    """Store one file (bounded by upload_slots) and analyse it; returns its scan row."""
+    async with upload_slots:
+        digest = await digest_upload(file, settings.max_upload_bytes)
+        preprocessed = await preprocess_upload(db, file, digest.sha256)
+        if preprocessed is not None:
+            file_url, derivatives = preprocessed.original_url, preprocessed.derivatives
+        else:
+            file_url = await upload_file_to_storage(
+                db, file.file, file.filename, file.content_type, content_hash=digest.sha256
+            )
+            derivatives = None
+    analysis_url = (derivatives or {}).get("analysis", file_url)
+    analysis = await get_analysis(analysis_url, digest.sha256)
+    return build_scan_row(file_url, patient_data, analysis, derivatives)
+
+
+async def upload_batch(
+    db: Client,
+    items: List[Tuple[UploadFile, Dict[str, Any]]]
+) -> List[Dict[str, Any]]:
+    """
+    Store, analyse and save a batch of scans.
+
+    Storage uploads run with at most settings.batch_upload_concurrency in
+    flight; analyses run in parallel; all successful rows are written with a
+    single bulk insert.
+
+    Args:
+        db: Shared Supabase client
+        items: (file, patient data) pairs
+
+    Returns:
+        One result per item, in order: {"index", "filename", "scan", "error"}
+    """
+    upload_slots = asyncio.Semaphore(settings.batch_upload_concurrency)
+    outcomes = await asyncio.gather(
+        *(_store_and_analyze(db, file, patient, upload_slots) for file, patient in items),
+        return_exceptions=True
+    )
+
+    results: List[Dict[str, Any]] = []
+    rows: List[Dict[str, Any]] = []
+    row_indexes: List[int] = []
+    for index, ((file, _), outcome) in enumerate(zip(items, outcomes)):
+        error: Optional[str] = None
+        if isinstance(outcome, BaseException):
+            logger.warning("Batch item failed: %s", outcome, extra={"index": index})
+            error = str(outcome)
+        else:
+            rows.append(outcome)
+            row_indexes.append(index)
+        results.append({"index": index, "filename": file.filename, "scan": None, "error": error})
+
+    if rows:
+        try:
+            saved = await save_scans(db, rows)
+        except Exception as e:
+            logger.error("Batch insert failed: %s", e, extra={"rows": len(rows)})
+            for index in row_indexes:
+                results[index]["error"] = f"Failed to save scan: {str(e)}"
+        else:
+            for index, scan in zip(row_indexes, saved):
+                results[index]["scan"] = scan
+
+    return results
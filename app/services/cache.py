@@ -0,0 +1,273 @@
+"""Caching of AI analysis results (keyed by image content hash) and of scan read responses."""
+import asyncio
+import functools
+import hashlib
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+from app.core.config import settings
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+
+class TTLCache:
+    """In-process LRU cache whose entries expire after ttl seconds."""
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a value, evicting the least recently used entry when full."""
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCacheStore:
+    """
+    Persistent cache tier backed by a local SQLite file (survives restarts).
+
+    Statements run on one dedicated thread, so waiting on another writer's
+    lock or syncing the WAL never stalls the event loop.
+    """
+
+    def __init__(self, path: str, ttl: float):
+        self.ttl = ttl
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="analysis-cache")
+
+    async def _run(self, func: Callable[..., T], *args: Any) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args))
+
+    def _get(self, key: str) -> Optional[Any]:
+        row = self._conn.execute(
+            "SELECT value FROM cache WHERE key = ? AND expires_at > ?",
+            (key, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _set(self, key: str, value: Any) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, json.dumps(value, default=str), time.time() + self.ttl)
+        )
+
+    async def get(self, key: str) -> Optional[Any]:
+        return await self._run(self._get, key)
+
+    async def set(self, key: str, value: Any) -> None:
+        await self._run(self._set, key, value)
+
+    async def close(self) -> None:
+        await self._run(self._conn.close)
+        self._executor.shutdown(wait=True)
+
+
+class AnalysisCache:
+    """
+    Two-tier analysis result cache: in-memory LRU in front of an optional
+    persistent store. Keys are SHA-256 digests of the scan image.
+    """
+
+    def __init__(self, memory: TTLCache, persistent: Optional[SQLiteCacheStore] = None):
+        self.memory = memory
+        self.persistent = persistent
+        self.hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+
+    async def get(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        """Return a cached analysis for this image, or None."""
+        value = self.memory.get(content_hash)
+        if value is not None:
+            self.hits += 1
+            return value
+        if self.persistent is not None:
+            value = await self.persistent.get(content_hash)
+            if value is not None:
+                self.persistent_hits += 1
+                self.memory.set(content_hash, value)
+                return value
+        self.misses += 1
+        return None
+
+    async def set(self, content_hash: str, analysis: Dict[str, Any]) -> None:
+        """Cache the analysis for this image in every tier."""
+        self.memory.set(content_hash, analysis)
+        if self.persistent is not None:
+            await self.persistent.set(content_hash, analysis)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size."""
+        lookups = self.hits + self.persistent_hits + self.misses
+        return {
+            "hits": self.hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.hits + self.persistent_hits) / lookups, 4) if lookups else 0.0,
+            "size": len(self.memory),
+            "max_size": self.memory.max_size,
+            "persistent": self.persistent is not None
+        }
+
+    async def close(self) -> None:
+        if self.persistent is not None:
+            await self.persistent.close()
+
+
+class RedisCacheStore:
+    """
+    Shared cache tier in Redis, so every worker and instance sees one cache.
+
+    Needs the optional redis package (pip install redis).
+    """
+
+    def __init__(self, url: str, ttl: float, prefix: str):
+        import redis.asyncio as redis
+
+        self.ttl = ttl
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = await self._client.get(self.prefix + key)
+        return json.loads(value) if value is not None else None
+
+    async def set(self, key: str, value: Any) -> None:
+        await self._client.set(self.prefix + key, json.dumps(value, default=str), ex=int(self.ttl))
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag for a response body."""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+class ResponseCache:
+    """
+    Serialized read responses and their ETags: in-memory LRU in front of an
+    optional shared store. Holding the bytes means a hit costs neither a
+    database query nor JSON serialization. Only for immutable resources.
+    """
+
+    def __init__(self, memory: TTLCache, shared: Optional[RedisCacheStore] = None):
+        self.memory = memory
+        self.shared = shared
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Optional[Tuple[str, bytes]]:
+        """Return (etag, body) for a cached response, or None."""
+        entry = self.memory.get(key)
+        if entry is not None:
+            self.hits += 1
+            return entry
+        if self.shared is not None:
+            try:
+                value = await self.shared.get(key)
+            except Exception as e:
+                # The shared tier is an optimisation; reads go to the database instead
+                logger.warning("Shared cache read failed: %s", e)
+                value = None
+            if value is not None:
+                self.shared_hits += 1
+                entry = (value["etag"], value["body"].encode())
+                self.memory.set(key, entry)
+                return entry
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, body: bytes) -> Tuple[str, bytes]:
+        """Cache a serialized response in every tier; returns (etag, body)."""
+        entry = (make_etag(body), body)
+        self.memory.set(key, entry)
+        if self.shared is not None:
+            try:
+                await self.shared.set(key, {"etag": entry[0], "body": body.decode()})
+            except Exception as e:
+                logger.warning("Shared cache write failed: %s", e)
+        return entry
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size."""
+        lookups = self.hits + self.shared_hits + self.misses
+        return {
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.hits + self.shared_hits) / lookups, 4) if lookups else 0.0,
+            "size": len(self.memory),
+            "max_size": self.memory.max_size,
+            "shared": self.shared is not None
+        }
+
+    async def close(self) -> None:
+        if self.shared is not None:
+            await self.shared.close()
+
+
+_analysis_cache: Optional[AnalysisCache] = None
+
+
+def get_analysis_cache() -> AnalysisCache:
+    """Returns the process-wide analysis cache, creating it on first use."""
+    global _analysis_cache
+    if _analysis_cache is None:
+        persistent = None
+        if settings.analysis_cache_path:
+            persistent = SQLiteCacheStore(settings.analysis_cache_path, settings.analysis_cache_ttl)
+        _analysis_cache = AnalysisCache(
+            TTLCache(settings.analysis_cache_size, settings.analysis_cache_ttl),
+            persistent
+        )
+    return _analysis_cache
+
+
+_response_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    """Returns the process-wide scan response cache, creating it on first use."""
+    global _response_cache
+    if _response_cache is None:
+        shared = None
+        if settings.cache_redis_url:
+            shared = RedisCacheStore(settings.cache_redis_url, settings.scan_cache_ttl, "rheumalens:response:")
+        _response_cache = ResponseCache(
+            TTLCache(settings.scan_cache_size, settings.scan_cache_ttl),
+            shared
+        )
+    return _response_cache
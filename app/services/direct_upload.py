@@ -0,0 +1,109 @@
+"""Direct-to-storage uploads: clients send image bytes to a signed storage URL, not to the API."""
+from __future__ import annotations
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, TYPE_CHECKING
+from app.core.config import settings
+from app.core.database import run_db
+from app.core.resilience import STORAGE, get_dependency
+from app.services.jobs import AWAITING_UPLOAD, Job
+from app.services.storage import FileTooLargeError
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+# Directly uploaded objects live under this prefix; the name is the upload id
+DIRECT_UPLOAD_PREFIX = "uploads"
+
+
+class UploadNotFoundError(Exception):
+    """Raised when completing an upload whose object is not in storage yet."""
+
+
+class UploadExpiredError(Exception):
+    """Raised when completing an upload after its signed URL has expired."""
+
+
+async def create_direct_upload(db: Client, request: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Reserve an object path and create a signed upload URL for it.
+
+    The returned job is in the awaiting_upload state; the caller stores it so
+    the upload can be completed later (by any worker sharing the job store).
+
+    Args:
+        db: Shared Supabase client
+        request: Validated UploadInitRequest fields
+
+    Returns:
+        {"job", "upload_url", "token", "path", "expires_at"}
+
+    Raises:
+        FileTooLargeError: If the declared size exceeds settings.max_upload_bytes
+    """
+    if request.get("size") is not None and request["size"] > settings.max_upload_bytes:
+        raise FileTooLargeError(
+            f"File exceeds the maximum upload size of {settings.max_upload_bytes} bytes"
+        )
+
+    job = Job(payload={}, status=AWAITING_UPLOAD, stage=AWAITING_UPLOAD)
+    path = f"{DIRECT_UPLOAD_PREFIX}/{job.id}{Path(request['filename']).suffix.lower()}"
+    job.payload = {
+        "object_path": path,
+        "content_type": request["content_type"],
+        "patient_data": {"patient_name": request["patient_name"], "age": request["age"]},
+    }
+
+    bucket = db.storage.from_(settings.supabase_storage_bucket)
+    signed = await get_dependency(STORAGE).call(
+        lambda: run_db(bucket.create_signed_upload_url, path)
+    )
+    expires_at = datetime.fromisoformat(job.created_at) + timedelta(seconds=settings.direct_upload_expiry)
+    return {
+        "job": job,
+        "upload_url": signed["signed_url"],
+        "token": signed["token"],
+        "path": path,
+        "expires_at": expires_at,
+    }
+
+
+async def verify_direct_upload(db: Client, job: Job) -> str:
+    """
+    Check that a direct upload's object exists and is within the size limit.
+
+    Oversized objects are deleted. Nothing is downloaded: the size comes from
+    the storage object metadata.
+
+    Args:
+        db: Shared Supabase client
+        job: Job created by create_direct_upload
+
+    Returns:
+        Public URL of the uploaded object
+
+    Raises:
+        UploadExpiredError: If the upload window has passed
+        UploadNotFoundError: If the object has not been uploaded
+        FileTooLargeError: If the object exceeds settings.max_upload_bytes
+    """
+    created_at = datetime.fromisoformat(job.created_at)
+    if datetime.utcnow() - created_at > timedelta(seconds=settings.direct_upload_expiry):
+        raise UploadExpiredError("Upload window has expired; start a new upload")
+
+    path = job.payload["object_path"]
+    bucket = db.storage.from_(settings.supabase_storage_bucket)
+    storage = get_dependency(STORAGE)
+    if not await storage.call(lambda: run_db(bucket.exists, path)):
+        raise UploadNotFoundError("File has not been uploaded to the signed URL yet")
+
+    info = await storage.call(lambda: run_db(bucket.info, path))
+    # Newer storage APIs report size at the top level, older ones in metadata
+    size = info.get("size") or (info.get("metadata") or {}).get("size") or 0
+    if int(size) > settings.max_upload_bytes:
+        await storage.call(lambda: run_db(bucket.remove, [path]))
+        raise FileTooLargeError(
+            f"File exceeds the maximum upload size of {settings.max_upload_bytes} bytes"
+        )
+
+    return bucket.get_public_url(path)
@@ -0,0 +1,103 @@
+"""
+In-process pub/sub of scan job events for streaming endpoints (SSE, WebSocket).
+
+Publishing never waits: every subscriber has a bounded buffer and, when a
+slow client lets it fill up, the oldest events are dropped (and counted) so
+the newest state always gets through. An idle subscriber is just an empty
+deque and an asyncio.Event, so thousands of them per worker are cheap.
+"""
+import asyncio
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Set
+from app.core.config import settings
+from app.core.metrics import EVENTS_DROPPED
+
+# Topic that receives every event
+ALL = "*"
+
+
+class Subscription:
+    """One subscriber's bounded event buffer."""
+
+    def __init__(self, topic: str, buffer_size: int):
+        self.topic = topic
+        self.dropped = 0
+        self._events: Deque[Dict[str, Any]] = deque(maxlen=buffer_size)
+        self._ready = asyncio.Event()
+
+    def offer(self, event: Dict[str, Any]) -> None:
+        """Buffer an event, dropping the oldest one if the buffer is full."""
+        if len(self._events) == self._events.maxlen:
+            self.dropped += 1
+            EVENTS_DROPPED.inc()
+        self._events.append(event)
+        self._ready.set()
+
+    async def next(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Wait for the next event; None if timeout passes first (time for a heartbeat)."""
+        if not self._events:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        return self._events.popleft()
+
+
+class SubscriberLimitError(Exception):
+    """Raised when subscribing while the broker is at its subscriber limit."""
+
+
+class EventBroker:
+    """Fans events out to subscribers of their topic and of ALL."""
+
+    def __init__(self, buffer_size: int, max_subscribers: int):
+        self.buffer_size = buffer_size
+        self.max_subscribers = max_subscribers
+        self._topics: Dict[str, Set[Subscription]] = {}
+        self._count = 0
+
+    def subscribe(self, topic: str = ALL) -> Subscription:
+        """
+        Start receiving events for a topic (a job id, or ALL).
+
+        Raises:
+            SubscriberLimitError: If max_subscribers are already connected
+        """
+        if self._count >= self.max_subscribers:
+            raise SubscriberLimitError("Too many event subscribers; try again later")
+        subscription = Subscription(topic, self.buffer_size)
+        self._topics.setdefault(topic, set()).add(subscription)
+        self._count += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Stop delivering events to a subscription."""
+        subscribers = self._topics.get(subscription.topic)
+        if subscribers is None or subscription not in subscribers:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self._topics[subscription.topic]
+        self._count -= 1
+
+    def publish(self, topic: str, event: Dict[str, Any]) -> None:
+        """Deliver an event to the topic's subscribers and to ALL subscribers (never blocks)."""
+        for name in (topic, ALL):
+            for subscription in self._topics.get(name, ()):
+                subscription.offer(event)
+
+    def subscribers(self) -> int:
+        """Number of open subscriptions."""
+        return self._count
+
+
+_event_broker: Optional[EventBroker] = None
+
+
+def get_event_broker() -> EventBroker:
+    """Returns the process-wide event broker, creating it on first use."""
+    global _event_broker
+    if _event_broker is None:
+        _event_broker = EventBroker(settings.events_buffer_size, settings.events_max_subscribers)
+    return _event_broker
@@ -0,0 +1,116 @@
+"""
+CPU-bound image processing run inside the preprocessing process pool.
+
+Kept free of application imports so worker processes start quickly.
+"""
+import io
+from typing import Dict, List
+
+
+# Modes PNG stores as they are; anything else (CMYK, YCbCr, ...) becomes RGB
+_PNG_MODES = {"1", "L", "LA", "I", "I;16", "P", "RGB", "RGBA"}
+
+
+def _encode_jpeg(image, quality: int) -> bytes:
+    buffer = io.BytesIO()
+    # No exif/icc_profile arguments and an empty comment (Pillow would copy
+    # the source's): the derivative carries no metadata
+    image.save(buffer, format="JPEG", quality=quality, optimize=True, comment=b"")
+    return buffer.getvalue()
+
+
+def strip_metadata(path: str, out_path: str) -> str:
+    """
+    Write a copy of an image without EXIF (GPS, device, dates), XMP, IPTC or comments.
+
+    JPEGs stay JPEG at full resolution, re-encoded with the source's
+    quantization tables and subsampling so quality is preserved; only the
+    EXIF orientation tag is kept. MPO files (JPEG with extra frames, as most
+    phone cameras write) are treated as JPEG and keep their primary image. Other formats are stored as lossless PNG
+    (first frame only) with orientation applied to the pixels. ICC colour
+    profiles are kept.
+
+    Args:
+        path: Image file on local disk
+        out_path: Where to write the copy
+
+    Returns:
+        Format written: "JPEG" or "PNG"
+
+    Raises:
+        PIL.UnidentifiedImageError, PIL.Image.DecompressionBombError, OSError:
+            If the file is not a valid, decodable image
+    """
+    from PIL import ExifTags, Image, ImageOps
+    from PIL.JpegImagePlugin import get_sampling
+
+    with Image.open(path) as image:
+        icc_profile = image.info.get("icc_profile")
+        if image.format in ("JPEG", "MPO"):
+            exif = Image.Exif()
+            orientation = image.getexif().get(ExifTags.Base.Orientation)
+            if orientation and orientation != 1:
+                exif[ExifTags.Base.Orientation] = orientation
+            image.save(
+                out_path,
+                format="JPEG",
+                # Equivalent to quality="keep", which Pillow refuses for MPO
+                qtables=image.quantization,
+                subsampling=get_sampling(image),
+                exif=exif.tobytes(),
+                icc_profile=icc_profile,
+                comment=b""
+            )
+            return "JPEG"
+
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in _PNG_MODES:
+            image = image.convert("RGB")
+        image.save(out_path, format="PNG", icc_profile=icc_profile)
+        return "PNG"
+
+
+def make_derivatives(
+    path: str,
+    analysis_max_side: int,
+    thumbnail_sizes: List[int],
+    quality: int
+) -> Dict[str, bytes]:
+    """
+    Validate an image and build metadata-free, orientation-corrected derivatives.
+
+    Args:
+        path: Image file on local disk
+        analysis_max_side: Longest side of the analysis copy in pixels
+        thumbnail_sizes: Longest side of each thumbnail in pixels
+        quality: JPEG quality of the derivatives
+
+    Returns:
+        JPEG bytes keyed by derivative name ("analysis", "thumbnail_<size>")
+
+    Raises:
+        PIL.UnidentifiedImageError, PIL.Image.DecompressionBombError, OSError:
+            If the file is not a valid, decodable image
+    """
+    from PIL import Image, ImageOps
+
+    # verify() catches truncated/corrupt files without decoding pixels
+    with Image.open(path) as image:
+        image.verify()
+
+    with Image.open(path) as image:
+        # Let the JPEG decoder downscale while decoding (much cheaper than a full decode)
+        image.draft("RGB", (analysis_max_side, analysis_max_side))
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+
+        analysis = image.copy()
+        analysis.thumbnail((analysis_max_side, analysis_max_side), Image.LANCZOS)
+
+    derivatives = {"analysis": _encode_jpeg(analysis, quality)}
+    for size in thumbnail_sizes:
+        thumbnail = analysis.copy()
+        thumbnail.thumbnail((size, size), Image.LANCZOS)
+        derivatives[f"thumbnail_{size}"] = _encode_jpeg(thumbnail, quality)
+    return derivatives
@@ -0,0 +1,141 @@
+"""Optional image preprocessing stage: validation, metadata stripping and derivatives."""
+from __future__ import annotations
+import asyncio
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import BinaryIO, Dict, Optional, TYPE_CHECKING
+from fastapi import UploadFile
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.core.metrics import observe_stage
+from app.services.image_worker import make_derivatives, strip_metadata
+from app.services.storage import CHUNK_SIZE, upload_derivative
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+logger = get_logger(__name__)
+
+
+class InvalidImageError(Exception):
+    """Raised when an upload declared as an image cannot be decoded."""
+
+
+@dataclass
+class PreprocessedImage:
+    """Storage URLs of a preprocessed upload."""
+
+    # Metadata-free copy, stored and analysed in place of the upload itself
+    original_url: str
+    derivatives: Dict[str, str]
+
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Returns the image processing pool, creating it on first use."""
+    global _process_pool
+    if _process_pool is None:
+        # spawn: forking a process that already runs threads is unsafe
+        _process_pool = ProcessPoolExecutor(
+            max_workers=settings.image_workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _process_pool
+
+
+def shutdown_process_pool() -> None:
+    """Stop the image processing workers."""
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=True, cancel_futures=True)
+        _process_pool = None
+
+
+def _stage_to_disk(file: BinaryIO) -> str:
+    """Copy an upload to a named temp file (in chunks) so a worker process can open it."""
+    file.seek(0)
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".img") as staged:
+        shutil.copyfileobj(file, staged, CHUNK_SIZE)
+    file.seek(0)
+    return staged.name
+
+
+def should_preprocess(content_type: Optional[str]) -> bool:
+    """Whether an upload goes through the preprocessing stage."""
+    return settings.image_preprocessing and (content_type or "").startswith("image/")
+
+
+async def preprocess_upload(
+    db: Client,
+    file: UploadFile,
+    content_hash: str
+) -> Optional[PreprocessedImage]:
+    """
+    Validate an uploaded image, then store a metadata-free copy of it and its derivatives.
+
+    Decoding and resizing run in a process pool, so they neither block the
+    event loop nor compete with it for the GIL. The stored original keeps its
+    resolution (see strip_metadata); derivatives are re-encoded JPEGs with
+    metadata removed and orientation applied. The upload's own bytes, which
+    may carry GPS position, device and free-text comments, are never stored.
+
+    Args:
+        db: Shared Supabase client
+        file: Uploaded file
+        content_hash: SHA-256 hex digest of the upload (names the stored objects)
+
+    Returns:
+        Public URLs of the stripped original and of each derivative, or None
+        if preprocessing does not apply to this upload
+
+    Raises:
+        InvalidImageError: If the file is not a decodable image
+    """
+    if not should_preprocess(file.content_type):
+        return None
+    from PIL import Image  # only needed (and only imported) when preprocessing is on
+
+    path = await asyncio.to_thread(_stage_to_disk, file.file)
+    stripped_path = path + ".stripped"
+    try:
+        loop = asyncio.get_running_loop()
+        pool = get_process_pool()
+        with observe_stage("preprocess"):
+            # Wait for both, so neither still writes once the staged files are removed
+            derivatives, image_format = await asyncio.gather(
+                loop.run_in_executor(
+                    pool,
+                    make_derivatives,
+                    path,
+                    settings.image_analysis_max_side,
+                    settings.image_thumbnail_sizes,
+                    settings.image_jpeg_quality
+                ),
+                loop.run_in_executor(pool, strip_metadata, path, stripped_path),
+                return_exceptions=True
+            )
+        for result in (derivatives, image_format):
+            if isinstance(result, (OSError, SyntaxError, ValueError, Image.DecompressionBombError)):
+                logger.warning("Image rejected: %s", result)
+                raise InvalidImageError("File is not a valid image")
+            if isinstance(result, BaseException):
+                raise result
+
+        names = list(derivatives)
+        with open(stripped_path, "rb") as stripped:
+            original_url, *urls = await asyncio.gather(
+                upload_derivative(db, content_hash, "original", stripped, f"image/{image_format.lower()}"),
+                *(upload_derivative(db, content_hash, name, derivatives[name]) for name in names)
+            )
+    finally:
+        for staged in (path, stripped_path):
+            if os.path.exists(staged):
+                os.remove(staged)
+
+    return PreprocessedImage(original_url=original_url, derivatives=dict(zip(names, urls)))
@@ -0,0 +1,505 @@
+"""Background job queue and worker pool for asynchronous scan processing."""
+import asyncio
+import functools
+import json
+import sqlite3
+import time
+import uuid
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, List, Callable, Awaitable, Tuple, TypeVar
+from app.core.config import settings
+from app.core.database import get_db
+from app.core.logger import get_logger
+from app.services.events import get_event_broker
+from app.services.scans import analyze_and_save
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+
+# Job statuses
+AWAITING_UPLOAD = "awaiting_upload"  # direct upload initialised, file not yet confirmed
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+# Seconds a worker waits after an unexpected error before claiming again
+WORKER_ERROR_BACKOFF = 1.0
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at its maximum depth."""
+
+
+@dataclass
+class Job:
+    """A unit of background work: analyse and persist one stored scan."""
+
+    payload: Dict[str, Any]
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: str = QUEUED
+    stage: str = "stored"
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
+    updated_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
+
+    def touch(self) -> None:
+        """Refresh the update timestamp."""
+        self.updated_at = datetime.utcnow().isoformat()
+
+
+def job_event(job: "Job") -> Dict[str, Any]:
+    """
+    Event published on every job change. Its type is the job's stage
+    (stored, analyzing, analyzed, saving, done) or "failed".
+    """
+    event = {
+        "type": "failed" if job.status == FAILED else job.stage,
+        "job_id": job.id,
+        "status": job.status,
+        "stage": job.stage,
+        "updated_at": job.updated_at
+    }
+    if job.status == SUCCEEDED and job.result:
+        event["scan_id"] = job.result.get("id")
+    if job.error:
+        event["error"] = job.error
+    return event
+
+
+def retention_cutoffs(retention: float) -> Tuple[str, str]:
+    """
+    Timestamps before which jobs are evicted: (updated_at of succeeded /
+    failed jobs, created_at of uploads still awaiting their file, whose
+    signed URL expired at least `retention` seconds ago).
+    """
+    now = datetime.utcnow()
+    finished = now - timedelta(seconds=retention)
+    abandoned = finished - timedelta(seconds=settings.direct_upload_expiry)
+    return finished.isoformat(), abandoned.isoformat()
+
+
+class JobLeaseLostError(Exception):
+    """Raised when saving a job that another process has taken over."""
+
+
+class JobQueue(ABC):
+    """Interface for job queues used by the worker pool."""
+
+    def __init__(self, max_depth: int, maintenance_interval: float = 60.0):
+        self._max_depth = max_depth
+        self._maintenance_interval = maintenance_interval
+        self._pending: asyncio.Queue = asyncio.Queue()
+        self._maintenance: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """Run maintenance once (e.g. recover unfinished jobs), then every maintenance_interval."""
+        await self.maintain()
+        self._maintenance = asyncio.create_task(self._run_maintenance(), name="job-queue-maintenance")
+
+    async def close(self) -> None:
+        """Stop maintenance and release any resources held by the queue."""
+        if self._maintenance is not None:
+            self._maintenance.cancel()
+            await asyncio.gather(self._maintenance, return_exceptions=True)
+            self._maintenance = None
+
+    async def maintain(self) -> None:
+        """Periodic housekeeping."""
+
+    async def _run_maintenance(self) -> None:
+        while True:
+            await asyncio.sleep(self._maintenance_interval)
+            try:
+                await self.maintain()
+            except Exception as e:
+                logger.warning("Job queue maintenance failed: %s", e)
+
+    async def submit(self, job: Job) -> None:
+        """
+        Enqueue a job (returns once it is stored, without waiting for a worker).
+
+        Raises:
+            QueueFullError: If the queue is at its maximum depth
+        """
+        if self._pending.qsize() >= self._max_depth:
+            raise QueueFullError("Job queue is full, try again later")
+        await self._save(job)
+        self._pending.put_nowait(job.id)
+        get_event_broker().publish(job.id, job_event(job))
+
+    async def next(self) -> Job:
+        """Wait for the next job to process and claim it (its status is then running)."""
+        while True:
+            job_id = await self._pending.get()
+            job = await self.claim(job_id, QUEUED)
+            if job is not None:
+                return job
+
+    async def claim(self, job_id: str, status: str) -> Optional[Job]:
+        """
+        Atomically move a job from `status` to running, owned by this process.
+
+        Returns:
+            The claimed job, or None if it is unknown or no longer in `status`
+            (another worker or request got to it first)
+        """
+        job = await self._claim(job_id, status)
+        if job is not None:
+            get_event_broker().publish(job.id, job_event(job))
+        return job
+
+    async def update(self, job: Job) -> None:
+        """
+        Persist a change to a job's status, stage, result or error.
+
+        Raises:
+            JobLeaseLostError: If another process has taken the job over
+        """
+        job.touch()
+        await self._save(job)
+        get_event_broker().publish(job.id, job_event(job))
+
+    def depth(self) -> int:
+        """Number of jobs waiting to be picked up."""
+        return self._pending.qsize()
+
+    @abstractmethod
+    async def get(self, job_id: str) -> Optional[Job]:
+        """Return a job by id, or None if unknown."""
+
+    @abstractmethod
+    async def _claim(self, job_id: str, status: str) -> Optional[Job]:
+        """Set a job in `status` to running; None if it is unknown or in another status."""
+
+    @abstractmethod
+    async def _save(self, job: Job) -> None:
+        """Store a job."""
+
+
+class InMemoryJobQueue(JobQueue):
+    """
+    Process-local job queue. Jobs are lost when the process exits, and
+    finished or abandoned ones are evicted after `retention` seconds.
+    """
+
+    def __init__(self, max_depth: int, retention: float):
+        super().__init__(max_depth)
+        self._retention = retention
+        self._jobs: Dict[str, Job] = {}
+
+    async def maintain(self) -> None:
+        finished, abandoned = retention_cutoffs(self._retention)
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if (job.status in (SUCCEEDED, FAILED) and job.updated_at < finished)
+            or (job.status == AWAITING_UPLOAD and job.created_at < abandoned)
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    async def _claim(self, job_id: str, status: str) -> Optional[Job]:
+        job = self._jobs.get(job_id)
+        if job is None or job.status != status:
+            return None
+        job.status = RUNNING
+        job.touch()
+        return job
+
+    async def _save(self, job: Job) -> None:
+        self._jobs[job.id] = job
+
+
+class SQLiteJobQueue(JobQueue):
+    """
+    Durable job queue backed by a SQLite file that several processes may share.
+
+    Each process holds a lease on the queued and running jobs it owns and
+    renews it every lease_timeout / 3 seconds. A worker only starts a job it
+    has claimed with an atomic UPDATE, and writes to a job whose lease is held
+    by another process fail, so each job runs once. Jobs whose owner stopped
+    renewing (it exited or crashed) are re-queued by the next process to run
+    maintenance, so in-flight work survives a restart; maintenance also
+    deletes finished or abandoned jobs after `retention` seconds. Every
+    statement runs on one dedicated thread: each autocommit syncs the WAL,
+    which must not stall the event loop.
+    """
+
+    def __init__(self, max_depth: int, path: str, lease_timeout: float, retention: float):
+        super().__init__(max_depth, maintenance_interval=lease_timeout / 3)
+        self._path = path
+        self._lease_timeout = lease_timeout
+        self._retention = retention
+        self._owner = uuid.uuid4().hex
+        self._conn: Optional[sqlite3.Connection] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="job-store")
+
+    async def _run(self, func: Callable[..., T], *args: Any) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args))
+
+    def _open(self) -> None:
+        self._conn = sqlite3.connect(self._path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # Serialised, so workers starting together do not race the migration
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    stage TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL,
+                    owner TEXT,
+                    lease_until REAL NOT NULL DEFAULT 0
+                )
+                """
+            )
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+            if "owner" not in columns:
+                # Files created before leases: their unfinished jobs are free to adopt
+                self._conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+                self._conn.execute("ALTER TABLE jobs ADD COLUMN lease_until REAL NOT NULL DEFAULT 0")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_idx ON jobs (status, lease_until)")
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def _renew_and_adopt(self) -> List[str]:
+        """Extend our leases and take over unfinished jobs whose lease expired."""
+        now = time.time()
+        self._conn.execute(
+            "UPDATE jobs SET lease_until = ? WHERE owner = ? AND status IN (?, ?)",
+            (now + self._lease_timeout, self._owner, QUEUED, RUNNING)
+        )
+        rows = self._conn.execute(
+            "UPDATE jobs SET status = ?, owner = ?, lease_until = ? "
+            "WHERE status IN (?, ?) AND lease_until < ? RETURNING id, created_at",
+            (QUEUED, self._owner, now + self._lease_timeout, QUEUED, RUNNING, now)
+        ).fetchall()
+        return [job_id for job_id, _ in sorted(rows, key=lambda row: row[1])]
+
+    def _evict(self) -> None:
+        finished, abandoned = retention_cutoffs(self._retention)
+        self._conn.execute(
+            "DELETE FROM jobs WHERE (status IN (?, ?) AND updated_at < ?) OR (status = ? AND created_at < ?)",
+            (SUCCEEDED, FAILED, finished, AWAITING_UPLOAD, abandoned)
+        )
+
+    def _release(self) -> None:
+        """Let other processes adopt our unfinished jobs right away."""
+        self._conn.execute(
+            "UPDATE jobs SET lease_until = 0 WHERE owner = ? AND status IN (?, ?)",
+            (self._owner, QUEUED, RUNNING)
+        )
+
+    async def start(self) -> None:
+        await self._run(self._open)
+        await super().start()
+
+    async def maintain(self) -> None:
+        adopted = await self._run(self._renew_and_adopt)
+        for job_id in adopted:
+            # Recovered jobs were already accepted, so they bypass max_depth
+            self._pending.put_nowait(job_id)
+            job = await self.get(job_id)
+            if job is not None:
+                get_event_broker().publish(job_id, job_event(job))
+        if adopted:
+            logger.info("Recovered unfinished jobs", extra={"jobs": len(adopted)})
+        await self._run(self._evict)
+
+    async def close(self) -> None:
+        await super().close()
+        if self._conn is not None:
+            await self._run(self._release)
+            await self._run(self._conn.close)
+        self._executor.shutdown(wait=True)
+
+    def _get(self, job_id: str) -> Optional[Job]:
+        row = self._conn.execute(
+            "SELECT id, status, stage, payload, result, error, created_at, updated_at "
+            "FROM jobs WHERE id = ?",
+            (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return Job(
+            id=row[0],
+            status=row[1],
+            stage=row[2],
+            payload=json.loads(row[3]),
+            result=json.loads(row[4]) if row[4] else None,
+            error=row[5],
+            created_at=row[6],
+            updated_at=row[7]
+        )
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return await self._run(self._get, job_id)
+
+    def _claim_row(self, job_id: str, status: str) -> Optional[Job]:
+        now = time.time()
+        query = (
+            "UPDATE jobs SET status = ?, updated_at = ?, owner = ?, lease_until = ? "
+            "WHERE id = ? AND status = ?"
+        )
+        params: List[Any] = [
+            RUNNING, datetime.utcnow().isoformat(), self._owner, now + self._lease_timeout, job_id, status
+        ]
+        if status in (QUEUED, RUNNING):
+            # Leased: only ours, or one whose owner stopped renewing
+            query += " AND (owner = ? OR lease_until < ?)"
+            params += [self._owner, now]
+        if self._conn.execute(query, params).rowcount == 0:
+            return None
+        return self._get(job_id)
+
+    async def _claim(self, job_id: str, status: str) -> Optional[Job]:
+        return await self._run(self._claim_row, job_id, status)
+
+    def _save_row(self, job: Job) -> None:
+        now = time.time()
+        cursor = self._conn.execute(
+            "INSERT INTO jobs "
+            "(id, status, stage, payload, result, error, created_at, updated_at, owner, lease_until) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (id) DO UPDATE SET "
+            "status = excluded.status, stage = excluded.stage, payload = excluded.payload, "
+            "result = excluded.result, error = excluded.error, updated_at = excluded.updated_at, "
+            "owner = excluded.owner, lease_until = excluded.lease_until "
+            "WHERE jobs.owner = excluded.owner OR jobs.status NOT IN (?, ?) OR jobs.lease_until < ?",
+            (
+                job.id,
+                job.status,
+                job.stage,
+                json.dumps(job.payload),
+                json.dumps(job.result, default=str) if job.result is not None else None,
+                job.error,
+                job.created_at,
+                job.updated_at,
+                self._owner,
+                now + self._lease_timeout,
+                QUEUED,
+                RUNNING,
+                now
+            )
+        )
+        if cursor.rowcount == 0:
+            raise JobLeaseLostError(f"Job {job.id} is held by another worker")
+
+    async def _save(self, job: Job) -> None:
+        await self._run(self._save_row, job)
+
+
+JobHandler = Callable[[Job, Callable[[str], Awaitable[None]]], Awaitable[Dict[str, Any]]]
+
+
+class JobWorkerPool:
+    """Fixed number of asyncio workers draining a JobQueue."""
+
+    def __init__(self, queue: JobQueue, handler: JobHandler, concurrency: int):
+        self.queue = queue
+        self._handler = handler
+        self._concurrency = concurrency
+        self._workers: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        """Start the queue and spawn the workers."""
+        await self.queue.start()
+        self._workers = [
+            asyncio.create_task(self._work(), name=f"job-worker-{i}")
+            for i in range(self._concurrency)
+        ]
+
+    async def stop(self) -> None:
+        """Cancel the workers and close the queue."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        await self.queue.close()
+
+    async def _work(self) -> None:
+        while True:
+            try:
+                await self._run_next()
+            except Exception as e:
+                # Keep the worker alive (e.g. "database is locked" on a shared job store)
+                logger.exception("Job worker error: %s", e)
+                await asyncio.sleep(WORKER_ERROR_BACKOFF)
+
+    async def _run_next(self) -> None:
+        """Claim the next job, run it and store its outcome."""
+        job = await self.queue.next()
+
+        async def on_stage(stage: str, job: Job = job) -> None:
+            job.stage = stage
+            await self.queue.update(job)
+
+        try:
+            job.result = await self._handler(job, on_stage)
+            job.status = SUCCEEDED
+            job.stage = "done"
+        except JobLeaseLostError:
+            logger.warning("Job taken over by another worker", extra={"job_id": job.id})
+            return
+        except Exception as e:
+            logger.error("Job failed: %s", e, extra={"job_id": job.id})
+            job.status = FAILED
+            job.error = str(e)
+        try:
+            await self.queue.update(job)
+        except JobLeaseLostError:
+            logger.warning("Job taken over by another worker", extra={"job_id": job.id})
+
+
+def create_job_queue() -> JobQueue:
+    """Build the job queue configured in settings."""
+    if settings.job_queue_backend == "sqlite":
+        return SQLiteJobQueue(
+            settings.job_queue_max_depth, settings.job_queue_path,
+            settings.job_lease_timeout, settings.job_retention
+        )
+    return InMemoryJobQueue(settings.job_queue_max_depth, settings.job_retention)
+
+
+async def process_scan_job(job: Job, on_stage: Callable[[str], Awaitable[None]]) -> Dict[str, Any]:
+    """Job handler: analyse and persist the scan described by the job payload."""
+    return await analyze_and_save(
+        get_db(),
+        job.payload["file_url"],
+        job.payload["patient_data"],
+        on_stage=on_stage,
+        content_hash=job.payload.get("content_hash"),
+        derivatives=job.payload.get("derivatives")
+    )
+
+
+_job_pool: Optional[JobWorkerPool] = None
+
+
+def get_job_pool() -> JobWorkerPool:
+    """
+    Returns the scan job worker pool, creating it on first use.
+    Workers only run once start() has been awaited (see main.py lifespan).
+    """
+    global _job_pool
+    if _job_pool is None:
+        _job_pool = JobWorkerPool(create_job_queue(), process_scan_job, settings.job_workers)
+    return _job_pool
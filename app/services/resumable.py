@@ -0,0 +1,274 @@
+"""
+Resumable chunked uploads staged on local disk.
+
+A session preallocates a sparse staging file of the declared size; chunks
+are written at their offsets as they stream in, so a chunk that is cut off
+still keeps the bytes that arrived. Received byte ranges are recorded in a
+JSON sidecar next to the staging file, so sessions survive restarts and can
+be resumed by any worker sharing the staging directory. A lock file per
+session coordinates those workers: chunk writes hold it shared, while
+recording ranges and finalizing hold it exclusively.
+"""
+import asyncio
+import json
+import os
+import re
+import tempfile
+import uuid
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, BinaryIO, Dict, List, Optional
+from app.core.config import settings
+from app.core.filelock import try_lock, unlock
+from app.core.logger import get_logger
+from app.services.storage import CHUNK_SIZE
+
+logger = get_logger(__name__)
+
+_SESSION_ID = re.compile(r"^[0-9a-f]{32}$")
+
+# Seconds between attempts to take a session lock held by another request
+_LOCK_POLL_INTERVAL = 0.05
+
+
+class UploadSessionNotFoundError(Exception):
+    """Raised for an unknown or expired upload session."""
+
+
+class ChunkRangeError(Exception):
+    """Raised when a chunk starts or ends outside the declared file size."""
+
+
+def merge_ranges(ranges: List[List[int]]) -> List[List[int]]:
+    """Merge overlapping or adjacent [start, end) ranges."""
+    merged: List[List[int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def _write_at(file: BinaryIO, data: bytes, offset: int) -> None:
+    """Write data at offset (os.pwrite is not available on Windows)."""
+    file.seek(offset)
+    file.write(data)
+
+
+@dataclass
+class UploadSession:
+    """A resumable upload: declared file, patient data and the byte ranges received."""
+
+    size: int
+    filename: str
+    content_type: str
+    patient_data: Dict[str, Any]
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    received: List[List[int]] = field(default_factory=list)
+    created_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
+
+    @property
+    def received_bytes(self) -> int:
+        return sum(end - start for start, end in self.received)
+
+    @property
+    def is_complete(self) -> bool:
+        return self.received == [[0, self.size]] or self.size == 0
+
+    @property
+    def expires_at(self) -> datetime:
+        return datetime.fromisoformat(self.created_at) + timedelta(seconds=settings.resumable_upload_expiry)
+
+
+class ResumableUploadStore:
+    """Upload sessions as <id>.data (staged bytes) + <id>.json (metadata) in one directory."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._purger: Optional[asyncio.Task] = None
+
+    def data_path(self, session_id: str) -> str:
+        return os.path.join(self.directory, f"{session_id}.data")
+
+    def _meta_path(self, session_id: str) -> str:
+        return os.path.join(self.directory, f"{session_id}.json")
+
+    def _lock_path(self, session_id: str) -> str:
+        return os.path.join(self.directory, f"{session_id}.lock")
+
+    @asynccontextmanager
+    async def lock(self, session_id: str, shared: bool = False) -> AsyncIterator[None]:
+        """
+        Hold a session's lock file, which every worker sharing the directory honours.
+
+        Waits by polling, so no thread is tied up while another request holds
+        it. Once the session is deleted, the lock file is removed on release.
+
+        Raises:
+            UploadSessionNotFoundError: If the id is malformed or the session does not exist
+        """
+        if not _SESSION_ID.match(session_id) or not os.path.exists(self._meta_path(session_id)):
+            raise UploadSessionNotFoundError("Upload session not found")
+        fd = os.open(self._lock_path(session_id), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            while not try_lock(fd, shared):
+                await asyncio.sleep(_LOCK_POLL_INTERVAL)
+            try:
+                yield
+            finally:
+                unlock(fd)
+        finally:
+            os.close(fd)
+            if not os.path.exists(self._meta_path(session_id)):
+                try:
+                    os.remove(self._lock_path(session_id))
+                except OSError:
+                    pass  # already gone, or still open elsewhere (Windows)
+
+    def _save(self, session: UploadSession) -> None:
+        # Write-then-rename so a crash never leaves a half-written sidecar;
+        # the temp name is unique so concurrent writers never share it
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=f"{session.id}.", suffix=".json.tmp")
+        try:
+            with os.fdopen(fd, "w") as meta:
+                json.dump(asdict(session), meta)
+            os.replace(tmp_path, self._meta_path(session.id))
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def create(self, size: int, filename: str, content_type: str, patient_data: Dict[str, Any]) -> UploadSession:
+        """Start a session and preallocate its (sparse) staging file."""
+        session = UploadSession(
+            size=size, filename=filename, content_type=content_type, patient_data=patient_data
+        )
+        with open(self.data_path(session.id), "wb") as data:
+            data.truncate(size)
+        self._save(session)
+        return session
+
+    def get(self, session_id: str) -> UploadSession:
+        """
+        Load a session.
+
+        Raises:
+            UploadSessionNotFoundError: If the id is unknown, malformed or expired
+        """
+        if not _SESSION_ID.match(session_id):
+            raise UploadSessionNotFoundError("Upload session not found")
+        try:
+            with open(self._meta_path(session_id)) as meta:
+                session = UploadSession(**json.load(meta))
+        except FileNotFoundError:
+            raise UploadSessionNotFoundError("Upload session not found")
+        if session.expires_at < datetime.utcnow():
+            self.delete(session_id)
+            raise UploadSessionNotFoundError("Upload session has expired")
+        return session
+
+    async def write_chunk(self, session_id: str, offset: int, chunks: AsyncIterator[bytes]) -> UploadSession:
+        """
+        Stream a chunk into the staging file at offset.
+
+        Bytes are written in CHUNK_SIZE pieces as they arrive. Whatever was
+        written is recorded as received even if the stream breaks off, so the
+        client only has to resend what is missing.
+
+        Raises:
+            UploadSessionNotFoundError: If the session does not exist
+            ChunkRangeError: If the chunk falls outside the declared size
+        """
+        session = self.get(session_id)
+        if offset < 0 or offset > session.size:
+            raise ChunkRangeError(f"Offset must be between 0 and {session.size}")
+
+        written = 0
+        buffer = bytearray()
+        try:
+            # Shared: chunks are written side by side, but never while a finalize runs
+            async with self.lock(session_id, shared=True):
+                # Re-read: the session may have been finalized while we waited
+                session = self.get(session_id)
+                with open(self.data_path(session_id), "r+b") as data:
+                    async for piece in chunks:
+                        if offset + written + len(buffer) + len(piece) > session.size:
+                            raise ChunkRangeError(
+                                f"Chunk extends past the declared size of {session.size} bytes"
+                            )
+                        buffer += piece
+                        if len(buffer) >= CHUNK_SIZE:
+                            await asyncio.to_thread(_write_at, data, bytes(buffer), offset + written)
+                            written += len(buffer)
+                            buffer.clear()
+                    if buffer:
+                        await asyncio.to_thread(_write_at, data, bytes(buffer), offset + written)
+                        written += len(buffer)
+        finally:
+            if written:
+                async with self.lock(session_id):
+                    # Re-read: another request may have recorded ranges meanwhile
+                    session = self.get(session_id)
+                    session.received = merge_ranges(session.received + [[offset, offset + written]])
+                    self._save(session)
+        return session
+
+    def delete(self, session_id: str) -> None:
+        """Remove a session's staging file and metadata."""
+        for path in (self.data_path(session_id), self._meta_path(session_id)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def purge_expired(self) -> int:
+        """Delete sessions past their expiry; returns how many."""
+        purged = 0
+        for name in os.listdir(self.directory):
+            session_id, ext = os.path.splitext(name)
+            if ext != ".json":
+                continue
+            try:
+                self.get(session_id)
+            except UploadSessionNotFoundError:
+                purged += 1  # get() removed it
+        return purged
+
+    async def start(self, interval: float) -> None:
+        """Purge expired sessions now, then every interval seconds until stop()."""
+        await asyncio.to_thread(self.purge_expired)
+        self._purger = asyncio.create_task(self._purge_periodically(interval), name="resumable-purge")
+
+    async def stop(self) -> None:
+        """Stop the periodic purge."""
+        if self._purger is not None:
+            self._purger.cancel()
+            await asyncio.gather(self._purger, return_exceptions=True)
+            self._purger = None
+
+    async def _purge_periodically(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                purged = await asyncio.to_thread(self.purge_expired)
+            except OSError as e:
+                logger.warning("Purging expired upload sessions failed: %s", e)
+                continue
+            if purged:
+                logger.info("Purged expired upload sessions", extra={"sessions": purged})
+
+
+_resumable_store: Optional[ResumableUploadStore] = None
+
+
+def get_resumable_store() -> ResumableUploadStore:
+    """Returns the resumable upload store, creating its directory on first use."""
+    global _resumable_store
+    if _resumable_store is None:
+        directory = settings.resumable_upload_dir or os.path.join(
+            tempfile.gettempdir(), "rheumalens-resumable"
+        )
+        _resumable_store = ResumableUploadStore(directory)
+    return _resumable_store
@@ -0,0 +1,343 @@
+"""Scan pipeline service: analysis and persistence of stored scans."""
+from __future__ import annotations
+import base64
+import json
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Tuple, Callable, Awaitable, TYPE_CHECKING
+from app.core.config import settings
+from app.core.database import run_db
+from app.core.metrics import observe_stage
+from app.core.resilience import ANALYSIS, DATABASE, get_dependency
+from app.models.schemas import AnalysisResult
+from app.services.analysis import get_analysis_scheduler
+from app.services.cache import get_analysis_cache
+from app.services.write_behind import WriteBehindBuffer
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+
+SCANS_TABLE = "scans"
+
+# Client-generated UUID column used as the scan id under write-behind (add_scan_uid.sql)
+SCAN_UID_COLUMN = "uid"
+
+# Listing projection: everything except the large analysis JSONB column,
+# plus the two analysis fields the list view needs
+SUMMARY_COLUMNS = (
+    "id,patient_name,age,file_url,created_at,"
+    "diagnosis:analysis->>diagnosis,severity:analysis->>severity"
+)
+
+# Optional hook used to report pipeline progress ("analyzing", "saving", ...)
+StageCallback = Callable[[str], Awaitable[None]]
+
+
+def _scan_id(record: Dict[str, Any]) -> str:
+    """Public id of a row: its uid under write-behind (the id known before insert), else its id."""
+    if settings.scan_write_behind and record.get(SCAN_UID_COLUMN):
+        return str(record[SCAN_UID_COLUMN])
+    return str(record["id"])
+
+
+def _is_uuid(value: str) -> bool:
+    try:
+        uuid.UUID(value)
+    except ValueError:
+        return False
+    return True
+
+
+def record_to_response(record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Map a row of the scans table to the ScanResponse shape.
+
+    Args:
+        record: Row returned by Supabase
+
+    Returns:
+        Dictionary matching ScanResponse
+    """
+    return {
+        "id": _scan_id(record),
+        "patient_name": record["patient_name"],
+        "age": record["age"],
+        "image_url": record["file_url"],
+        "analysis_result": record["analysis"],
+        "created_at": record["created_at"],
+        "derivatives": record.get("derivatives")
+    }
+
+
+async def get_analysis(file_url: str, content_hash: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Analyse a stored scan, reusing a cached result for the same image.
+
+    Args:
+        file_url: Public URL of the stored scan
+        content_hash: SHA-256 hex digest of the image, used as the cache key
+
+    Returns:
+        Analysis result dictionary
+    """
+    cache = get_analysis_cache()
+    analysis = await cache.get(content_hash) if content_hash else None
+    if analysis is None:
+        with observe_stage("analysis"):
+            analysis = await get_dependency(ANALYSIS).call(
+                lambda: get_analysis_scheduler().analyze(file_url)
+            )
+        # Validated once, where the result enters the system; responses built
+        # from it are sent without re-validation
+        analysis = AnalysisResult.model_validate(analysis).model_dump(mode="json", exclude_unset=True)
+        if content_hash:
+            await cache.set(content_hash, analysis)
+    return analysis
+
+
+def build_scan_row(
+    file_url: str,
+    patient_data: Dict[str, Any],
+    analysis: Dict[str, Any],
+    derivatives: Optional[Dict[str, str]] = None
+) -> Dict[str, Any]:
+    """Build a scans table row from patient data, an analysis result and derivative URLs."""
+    row = {
+        "patient_name": patient_data.get("patient_name", "Unknown"),
+        "age": patient_data.get("age", 0),
+        "file_url": file_url,
+        "analysis": analysis
+    }
+    if derivatives:
+        row["derivatives"] = derivatives
+    return row
+
+
+async def save_scans(db: Client, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Insert one or more scan rows in a single request.
+
+    Args:
+        db: Shared Supabase client
+        rows: Rows built with build_scan_row
+
+    Returns:
+        Saved scans matching ScanResponse, in the same order as rows
+    """
+    with observe_stage("db_insert"):
+        # Not idempotent (ids are assigned by the database), so never retried
+        response = await get_dependency(DATABASE).call(
+            lambda: run_db(db.table(SCANS_TABLE).insert(rows).execute), idempotent=False
+        )
+    return [record_to_response(record) for record in response.data]
+
+
+_scan_writer: Optional[WriteBehindBuffer] = None
+
+
+def get_scan_writer() -> WriteBehindBuffer:
+    """
+    Returns the write-behind buffer for scan rows, creating it on first use.
+    It only flushes once start() has been awaited (see main.py lifespan).
+    """
+    global _scan_writer
+    if _scan_writer is None:
+        _scan_writer = WriteBehindBuffer(
+            SCANS_TABLE,
+            SCAN_UID_COLUMN,
+            settings.scan_write_log_dir,
+            settings.scan_write_batch_size,
+            settings.scan_write_flush_interval,
+            fsync=settings.scan_write_fsync
+        )
+    return _scan_writer
+
+
+async def analyze_and_save(
+    db: Client,
+    file_url: str,
+    patient_data: Dict[str, Any],
+    on_stage: Optional[StageCallback] = None,
+    content_hash: Optional[str] = None,
+    derivatives: Optional[Dict[str, str]] = None
+) -> Dict[str, Any]:
+    """
+    Run AI analysis on a stored scan and save the result to the scans table.
+
+    If content_hash is given, a cached analysis of the same image is reused
+    instead of running the analysis again.
+
+    Args:
+        db: Shared Supabase client
+        file_url: Public URL of the already stored scan
+        patient_data: Parsed patient data (patient_name, age)
+        on_stage: Optional coroutine called with the name of each stage
+        content_hash: SHA-256 hex digest of the image, used as the cache key
+        derivatives: Derivative URLs from preprocessing; analysis then runs
+            on the downscaled "analysis" copy
+
+    Returns:
+        Dictionary matching ScanResponse
+    """
+    if on_stage:
+        await on_stage("analyzing")
+    analysis_url = (derivatives or {}).get("analysis", file_url)
+    analysis = await get_analysis(analysis_url, content_hash)
+    if on_stage:
+        await on_stage("analyzed")
+        await on_stage("saving")
+    row = build_scan_row(file_url, patient_data, analysis, derivatives)
+    if settings.scan_write_behind:
+        # Answer as soon as the row is in the local log; the insert is batched
+        row["created_at"] = datetime.now(timezone.utc).isoformat()
+        with observe_stage("write_log"):
+            row = await get_scan_writer().add(row)
+        return record_to_response(row)
+    saved = await save_scans(db, [row])
+    return saved[0]
+
+
+async def get_scan(db: Client, scan_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Fetch a single scan by id.
+
+    Args:
+        db: Shared Supabase client
+        scan_id: Scan id, or a scan uid (UUID)
+
+    Returns:
+        Dictionary matching ScanResponse, or None if the scan does not exist
+    """
+    column = "id"
+    if _is_uuid(scan_id):
+        if settings.scan_write_behind:
+            # Read-your-writes for rows still waiting in the write-behind buffer
+            buffered = get_scan_writer().get(scan_id)
+            if buffered is not None:
+                return record_to_response(buffered)
+        column = SCAN_UID_COLUMN
+    query = db.table(SCANS_TABLE).select("*").eq(column, scan_id).limit(1)
+    response = await get_dependency(DATABASE).call(lambda: run_db(query.execute))
+    if not response.data:
+        return None
+    return record_to_response(response.data[0])
+
+
+def encode_cursor(created_at: str, scan_id: Any) -> str:
+    """Encode the (created_at, id) keyset position of a row as an opaque cursor."""
+    raw = json.dumps([created_at, scan_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Both parts are parsed rather than passed through, since they end up in a
+    PostgREST filter string.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, scan_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(scan_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def _escape_like(value: str) -> str:
+    """Escape LIKE wildcards so a prefix filter matches them literally."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+async def list_scans(
+    db: Client,
+    limit: int,
+    cursor: Optional[str] = None,
+    name_prefix: Optional[str] = None,
+    min_age: Optional[int] = None,
+    max_age: Optional[int] = None,
+    diagnosis: Optional[str] = None,
+    severity: Optional[str] = None,
+    include_analysis: bool = False
+) -> Dict[str, Any]:
+    """
+    List scans newest first using keyset pagination on (created_at, id).
+
+    Each page is a single index range scan, so its cost does not grow with
+    how deep the client has paged (see add_scan_indexes.sql).
+
+    Args:
+        db: Shared Supabase client
+        limit: Page size
+        cursor: next_cursor from the previous page
+        name_prefix: Case-insensitive patient name prefix
+        min_age: Minimum age (inclusive)
+        max_age: Maximum age (inclusive)
+        diagnosis: Exact analysis diagnosis
+        severity: Exact analysis severity
+        include_analysis: Also return the full analysis JSON
+
+    Returns:
+        {"items": [...], "next_cursor": str or None}
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    columns = SUMMARY_COLUMNS
+    if settings.image_preprocessing:
+        columns += ",derivatives"
+    if settings.scan_write_behind:
+        columns += f",{SCAN_UID_COLUMN}"
+    if include_analysis:
+        columns += ",analysis"
+    query = db.table(SCANS_TABLE).select(columns)
+
+    if name_prefix:
+        query = query.ilike("patient_name", f"{_escape_like(name_prefix)}%")
+    if min_age is not None:
+        query = query.gte("age", min_age)
+    if max_age is not None:
+        query = query.lte("age", max_age)
+    # Containment (@>) lets Postgres use the GIN index on the analysis column
+    analysis_filter = {
+        key: value for key, value in (("diagnosis", diagnosis), ("severity", severity)) if value
+    }
+    if analysis_filter:
+        query = query.contains("analysis", analysis_filter)
+    if cursor:
+        position, last_id = decode_cursor(cursor)
+        created_at = position.isoformat()
+        query = query.or_(
+            f'created_at.lt."{created_at}",'
+            f'and(created_at.eq."{created_at}",id.lt.{last_id})'
+        )
+
+    # Fetch one extra row to know whether another page exists
+    query = query.order("created_at", desc=True).order("id", desc=True).limit(limit + 1)
+    response = await get_dependency(DATABASE).call(lambda: run_db(query.execute))
+    rows = response.data
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+
+    items = [
+        {
+            "id": _scan_id(row),
+            "patient_name": row["patient_name"],
+            "age": row["age"],
+            "image_url": row["file_url"],
+            "created_at": row["created_at"],
+            "diagnosis": row.get("diagnosis"),
+            "severity": row.get("severity"),
+            "derivatives": row.get("derivatives"),
+            "analysis_result": row.get("analysis")
+        }
+        for row in rows
+    ]
+    return {"items": items, "next_cursor": next_cursor}
@@ -1,56 +1,169 @@
 """Supabase Storage service for file uploads."""
+from __future__ import annotations
+import hashlib
+import io
+import os
+import tempfile
 import uuid
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
+from typing import BinaryIO, Optional, Union, TYPE_CHECKING
+from fastapi import UploadFile
 from app.core.config import settings
-from app.core.database import get_db
+from app.core.metrics import observe_stage
+from app.core.database import run_db
+from app.core.resilience import STORAGE, DependencyUnavailableError, get_dependency
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+# Uploads are read in chunks of this size, bounding per-request memory
+CHUNK_SIZE = 1024 * 1024
+
+# Object name suffix of each format derivatives are stored in
+DERIVATIVE_EXTENSIONS = {"image/jpeg": ".jpg", "image/png": ".png"}
+
+
+class FileTooLargeError(Exception):
+    """Raised when an uploaded file exceeds settings.max_upload_bytes."""
+
+
+@dataclass
+class UploadDigest:
+    """Content hash and size of an uploaded file."""
+
+    sha256: str
+    size: int
+
+
+async def digest_upload(file: UploadFile, max_bytes: int) -> UploadDigest:
+    """
+    Hash and size-check an upload chunk by chunk, then rewind it.
+
+    Args:
+        file: Uploaded file (spooled to disk by Starlette when large)
+        max_bytes: Maximum accepted size
+
+    Returns:
+        SHA-256 hex digest and size in bytes
+
+    Raises:
+        FileTooLargeError: As soon as more than max_bytes have been read
+    """
+    sha256 = hashlib.sha256()
+    size = 0
+    while chunk := await file.read(CHUNK_SIZE):
+        size += len(chunk)
+        if size > max_bytes:
+            raise FileTooLargeError(f"File exceeds the maximum upload size of {max_bytes} bytes")
+        sha256.update(chunk)
+    await file.seek(0)
+    return UploadDigest(sha256=sha256.hexdigest(), size=size)
+
+
+def _open_stream(file: BinaryIO) -> Union[bytes, io.FileIO]:
+    """
+    Return something storage3 can send without loading the file into memory.
+
+    storage3 only streams real file objects (FileIO/BufferedReader), so the
+    spool file is re-opened through a duplicated descriptor; httpx then sends
+    it in chunks. In-memory buffers (small uploads) are returned as bytes.
+    """
+    # fileno() on a spool that is still in memory would roll it onto disk
+    if isinstance(file, tempfile.SpooledTemporaryFile) and not file._rolled:
+        file.seek(0)
+        return file.read()
+    try:
+        fd = file.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        file.seek(0)
+        return file.read()
+    stream = io.FileIO(os.dup(fd), "rb")
+    stream.seek(0)
+    return stream
+
+
+def _upload_object(bucket, path: str, file: Union[bytes, BinaryIO], file_options: dict) -> None:
+    """
+    Blocking upload, run in the DB thread pool.
+
+    The stream is opened and closed in the worker thread, once per attempt:
+    a retry must start from the beginning, and a timed-out attempt that is
+    still running must not have its descriptor closed underneath it.
+    """
+    body = file if isinstance(file, bytes) else _open_stream(file)
+    try:
+        bucket.upload(path=path, file=body, file_options=file_options)
+    finally:
+        if isinstance(body, io.FileIO):
+            body.close()
 
 
 async def upload_file_to_storage(
-    file_content: bytes,
+    db: Client,
+    file: Union[bytes, BinaryIO],
     file_name: str,
-    content_type: str = "image/jpeg"
+    content_type: str = "image/jpeg",
+    content_hash: Optional[str] = None
 ) -> str:
     """
     Upload a file to Supabase Storage and return the public URL.
+
+    When content_hash is given the object is stored under that hash, and the
+    upload is skipped if an object with the same content already exists.
     
     Args:
-        file_content: Binary content of the file
+        db: Shared Supabase client
+        file: Binary content of the file, or a file object to stream from
         file_name: Original file name
         content_type: MIME type of the file
+        content_hash: SHA-256 hex digest of the file (content-addressed storage)
         
     Returns:
         Public URL of the uploaded file
         
     Raises:
+        DependencyUnavailableError: If storage is failing fast or timed out
         Exception: If upload fails
     """
     try:
-        # Generate unique file name with timestamp and UUID
-        file_extension = Path(file_name).suffix
-        unique_file_name = f"{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}{file_extension}"
+        file_extension = Path(file_name).suffix.lower()
+        if content_hash:
+            # Content-addressed: identical images map to the same object
+            unique_file_name = f"{content_hash}{file_extension}"
+        else:
+            # Generate unique file name with timestamp and UUID
+            unique_file_name = f"{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}{file_extension}"
         
-        # Get Supabase client (synchronous, but we're in async function)
-        supabase = get_db()
-        bucket_name = settings.supabase_storage_bucket
+        # Supabase client is synchronous, so calls go through the DB thread pool
+        bucket = db.storage.from_(settings.supabase_storage_bucket)
         
-        # Upload file to storage (synchronous operation in async function is fine)
-        storage_response = supabase.storage.from_(bucket_name).upload(
-            path=unique_file_name,
-            file=file_content,
-            file_options={
-                "content-type": content_type,
-                "upsert": False
-            }
-        )
+        storage = get_dependency(STORAGE)
+        with observe_stage("storage_upload"):
+            already_stored = content_hash is not None and await storage.call(
+                lambda: run_db(bucket.exists, unique_file_name)
+            )
+            if not already_stored:
+                # Upload file to storage without blocking the event loop
+                file_options = {
+                    "content-type": content_type,
+                    # Same name means same bytes, so a concurrent duplicate may overwrite
+                    "upsert": "true" if content_hash else "false"
+                }
+                # Content-addressed uploads can be repeated safely, so they are retried
+                await storage.call(
+                    lambda: run_db(_upload_object, bucket, unique_file_name, file, file_options),
+                    idempotent=content_hash is not None
+                )
         
-        # Get public URL (synchronous operation)
-        public_url = supabase.storage.from_(bucket_name).get_public_url(
-            unique_file_name
-        )
+        # Get public URL (pure string building, no network call)
+        public_url = bucket.get_public_url(unique_file_name)
         
         return public_url
         
+    except DependencyUnavailableError:
+        raise
     except Exception as e:
         error_msg = str(e)
         # Provide more helpful error messages
@@ -63,4 +176,35 @@ async def upload_file_to_storage(
                 f"3. If you're behind a firewall/proxy\n"
                 f"4. Verify project exists at: https://supabase.com/dashboard"
             )
-        raise Exception(f"Failed to upload file to storage: {error_msg}")
\ No newline at end of file
+        raise Exception(f"Failed to upload file to storage: {error_msg}")
+
+
+async def upload_derivative(
+    db: Client,
+    content_hash: str,
+    name: str,
+    content: Union[bytes, BinaryIO],
+    content_type: str = "image/jpeg"
+) -> str:
+    """
+    Store an image derived from an upload (metadata-free original, analysis
+    copy, thumbnail) under the upload's hash.
+
+    Args:
+        db: Shared Supabase client
+        content_hash: SHA-256 hex digest of the upload
+        name: Derivative name, e.g. "original", "thumbnail_256"
+        content: Image bytes, or a file object to stream from
+        content_type: "image/jpeg" or "image/png"
+
+    Returns:
+        Public URL of the derivative
+    """
+    object_name = f"{content_hash}_{name}{DERIVATIVE_EXTENSIONS[content_type]}"
+    bucket = db.storage.from_(settings.supabase_storage_bucket)
+    file_options = {"content-type": content_type, "upsert": "true"}
+    # Derivatives are deterministic for a given upload, so overwriting (and retrying) is safe
+    await get_dependency(STORAGE).call(
+        lambda: run_db(_upload_object, bucket, object_name, content, file_options)
+    )
+    return bucket.get_public_url(object_name)
@@ -0,0 +1,277 @@
+"""
+Write-behind buffer: rows are logged locally, acknowledged, then bulk inserted.
+
+Each row carries a client-generated key (a UUID), so callers get a stable id
+without waiting for the database. Before add() returns, the row is appended
+(and, by default, fsynced) to a local log; a background task then inserts the
+buffered rows in bulk once batch_size rows are waiting or flush_interval has
+passed. Inserts are upserts on the key that ignore duplicates, so replaying a
+row that already reached the table is harmless and flushes can be retried.
+
+The log is a series of segment files per process (<owner>-<seq>.log, one JSON
+row per line) and each process holds a lock on <owner>.lock. A flush seals
+the current segment and deletes sealed segments once their rows are in the
+table. On start, a process adopts the segments of every owner whose lock is
+free (it exited or crashed), so several workers can share one log directory.
+"""
+from __future__ import annotations
+import asyncio
+import json
+import os
+import re
+import uuid
+from typing import Any, Dict, List, Optional, TextIO, Tuple
+from app.core.database import get_db, run_db
+from app.core.filelock import try_lock
+from app.core.logger import get_logger
+from app.core.metrics import observe_stage
+from app.core.resilience import DATABASE, get_dependency
+
+logger = get_logger(__name__)
+
+_SEGMENT = re.compile(r"^([0-9a-f]{32})-(\d+)\.log$")
+_LOCK = re.compile(r"^([0-9a-f]{32})\.lock$")
+
+
+class WriteBehindLockError(Exception):
+    """Raised when a buffer cannot lock its own log segments."""
+
+
+class WriteBehindBuffer:
+    """Buffers rows for one table and flushes them as bulk upserts keyed on `key`."""
+
+    def __init__(
+        self,
+        table: str,
+        key: str,
+        log_dir: str,
+        batch_size: int,
+        flush_interval: float,
+        fsync: bool = True
+    ):
+        self.table = table
+        self.key = key
+        self.log_dir = log_dir
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self._owner = uuid.uuid4().hex
+        self._seq = 0
+        self._log: Optional[TextIO] = None
+        # Segments whose rows were all buffered when they were sealed
+        self._sealed: List[str] = []
+        # Lock files (path, fd) held: our own first, then adopted owners
+        self._locks: List[Tuple[str, int]] = []
+        # Logged but not yet inserted, by key, in arrival order
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._unwritten: List[Tuple[str, Dict[str, Any], asyncio.Future]] = []
+        self._append_lock = asyncio.Lock()
+        self._flush_lock = asyncio.Lock()
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.log_dir, name)
+
+    def _try_lock(self, owner: str) -> Optional[int]:
+        """Lock an owner's lock file; None if a live process holds it."""
+        path = self._path(f"{owner}.lock")
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        if not try_lock(fd):
+            os.close(fd)
+            return None
+        self._locks.append((path, fd))
+        return fd
+
+    def _open_segment(self) -> None:
+        self._seq += 1
+        self._log = open(self._path(f"{self._owner}-{self._seq:06d}.log"), "a", encoding="utf-8")
+
+    def _recover(self) -> None:
+        """Lock our own log, adopt the segments of exited owners and open a segment."""
+        os.makedirs(self.log_dir, exist_ok=True)
+        # Unlocked segments are fair game for adoption, so never write any
+        if self._try_lock(self._owner) is None:
+            raise WriteBehindLockError(f"Could not lock {self._owner}.lock in {self.log_dir}")
+
+        segments: Dict[str, List[Tuple[int, str]]] = {}
+        for name in os.listdir(self.log_dir):
+            segment, lock = _SEGMENT.match(name), _LOCK.match(name)
+            if segment:
+                segments.setdefault(segment.group(1), []).append((int(segment.group(2)), name))
+            elif lock:
+                segments.setdefault(lock.group(1), [])
+
+        for owner, names in segments.items():
+            if owner == self._owner or self._try_lock(owner) is None:
+                continue
+            for _, name in sorted(names):
+                path = self._path(name)
+                with open(path, encoding="utf-8") as segment:
+                    for line in segment:
+                        try:
+                            row = json.loads(line)
+                        except json.JSONDecodeError:
+                            continue  # torn final line from a crash mid-append
+                        self._pending[row[self.key]] = row
+                self._sealed.append(path)
+
+        if self._pending:
+            logger.info(
+                "Replaying buffered rows", extra={"table": self.table, "rows": len(self._pending)}
+            )
+        self._open_segment()
+
+    def _write_lines(self, lines: List[str]) -> None:
+        self._log.write("".join(lines))
+        self._log.flush()
+        if self.fsync:
+            os.fsync(self._log.fileno())
+
+    def _rotate(self) -> None:
+        """Seal the current segment (if it holds anything) and start a new one."""
+        if self._log.tell() == 0:
+            return
+        self._log.close()
+        self._sealed.append(self._log.name)
+        self._open_segment()
+
+    def _release_sealed(self) -> None:
+        """Delete sealed segments and adopted lock files once their rows are flushed."""
+        for path in self._sealed:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self._sealed = []
+        own, adopted = self._locks[0], self._locks[1:]
+        for path, fd in adopted:
+            # Closed first: Windows cannot delete a file that is open
+            os.close(fd)
+            os.remove(path)
+        self._locks = [own]
+
+    async def start(self) -> None:
+        """
+        Replay rows left in the log and start the flush task.
+
+        Raises:
+            WriteBehindLockError: If this buffer's own log cannot be locked
+        """
+        await asyncio.to_thread(self._recover)
+        self._task = asyncio.create_task(self._run(), name=f"write-behind-{self.table}")
+        if self._pending:
+            self._wake.set()
+
+    async def stop(self) -> None:
+        """Stop the flush task and flush what is buffered; unflushed rows stay in the log."""
+        if self._log is None:
+            # start() failed before a segment was opened: release any locks
+            # taken and leave adopted segments in place for the next start
+            for _, fd in self._locks:
+                os.close(fd)
+            self._locks = []
+            return
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(
+                "Final flush failed; rows kept for replay: %s", e,
+                extra={"table": self.table, "rows": len(self._pending)}
+            )
+        self._log.close()
+        if not self._pending:
+            os.remove(self._log.name)
+        for path, fd in self._locks:
+            os.close(fd)
+            if not self._pending:
+                os.remove(path)
+        self._locks = []
+
+    async def add(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Log a row and buffer it for insertion.
+
+        Returns once the row is durable in the local log. Concurrent calls
+        share one write + fsync (group commit).
+
+        Args:
+            row: Row to insert; gets a new UUID under `key` if it has none
+
+        Returns:
+            The row as buffered (including its key)
+        """
+        row = {self.key: str(uuid.uuid4()), **row}
+        done = asyncio.get_running_loop().create_future()
+        self._unwritten.append((json.dumps(row, default=str) + "\n", row, done))
+        async with self._append_lock:
+            if self._unwritten:  # else an earlier holder already wrote our line
+                batch, self._unwritten = self._unwritten, []
+                try:
+                    await asyncio.to_thread(self._write_lines, [line for line, _, _ in batch])
+                except Exception as e:
+                    for _, _, future in batch:
+                        future.set_exception(e)
+                else:
+                    # Buffered under the append lock, so a rotation never
+                    # seals a logged row that is not in _pending
+                    for _, logged, future in batch:
+                        self._pending[logged[self.key]] = logged
+                        future.set_result(None)
+                    if len(self._pending) >= self.batch_size:
+                        self._wake.set()
+        await done
+        return row
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """A buffered row that has not been flushed yet, or None."""
+        return self._pending.get(key)
+
+    def pending(self) -> int:
+        """Number of rows waiting to be inserted."""
+        return len(self._pending)
+
+    async def _insert(self, rows: List[Dict[str, Any]]) -> None:
+        from postgrest.types import ReturnMethod
+
+        query = get_db().table(self.table).upsert(
+            rows, on_conflict=self.key, ignore_duplicates=True, returning=ReturnMethod.minimal
+        )
+        with observe_stage("db_insert"):
+            # Idempotent thanks to ignore_duplicates on the client-generated key
+            await get_dependency(DATABASE).call(lambda: run_db(query.execute))
+
+    async def flush(self) -> None:
+        """Insert everything buffered so far, batch_size rows per request."""
+        async with self._flush_lock:
+            async with self._append_lock:
+                if not self._pending:
+                    return
+                rows = list(self._pending.values())
+                await asyncio.to_thread(self._rotate)
+            for start in range(0, len(rows), self.batch_size):
+                batch = rows[start:start + self.batch_size]
+                await self._insert(batch)
+                for row in batch:
+                    self._pending.pop(row[self.key], None)
+            await asyncio.to_thread(self._release_sealed)
+            logger.debug("Flushed buffered rows", extra={"table": self.table, "rows": len(rows)})
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                # Rows stay buffered and logged; the next tick retries
+                logger.warning(
+                    "Flush failed: %s", e, extra={"table": self.table, "rows": len(self._pending)}
+                )
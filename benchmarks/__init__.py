@@ -0,0 +1 @@
+"""Benchmarks and load tests (run against a local Supabase stand-in)."""
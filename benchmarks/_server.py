@@ -0,0 +1,122 @@
+"""Helpers to run the API in a uvicorn subprocess pointed at the fake Supabase."""
+import os
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional
+
+import httpx
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def free_port() -> int:
+    """Return a TCP port that is currently free on localhost."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of samples (0 if empty)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds."""
+    return {
+        "count": len(samples),
+        "p50_ms": round(percentile(samples, 50) * 1000, 2),
+        "p95_ms": round(percentile(samples, 95) * 1000, 2),
+        "p99_ms": round(percentile(samples, 99) * 1000, 2),
+        "max_ms": round(max(samples) * 1000, 2) if samples else 0.0,
+    }
+
+
+@dataclass
+class ApiProcess:
+    """A running API server."""
+
+    url: str
+    pid: int
+
+
+def peak_rss_mb(pid: int) -> float:
+    """Peak resident set size (VmHWM) of a process in MB. Linux only."""
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmHWM:"):
+                return round(int(line.split()[1]) / 1024, 1)
+    return 0.0
+
+
+def reset_peak_rss(pid: int) -> bool:
+    """
+    Reset a process's VmHWM to its current RSS so the next peak_rss_mb()
+    covers only what happens afterwards. Linux only; False if not permitted.
+    """
+    try:
+        with open(f"/proc/{pid}/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+        return True
+    except OSError:
+        return False
+
+
+@contextmanager
+def run_api(
+    supabase_url: str,
+    env: Optional[Dict[str, str]] = None,
+    args: Optional[List[str]] = None,
+    serve: bool = False
+) -> Iterator[ApiProcess]:
+    """
+    Start the API (`uvicorn main:app`) in a subprocess and yield its URL and pid.
+
+    Args:
+        supabase_url: URL of the (fake) Supabase project
+        env: Extra environment variables (settings overrides)
+        args: Extra uvicorn command-line arguments
+        serve: Start the production entry point (`python main.py`, configured
+            through SERVER_* settings in env) instead of plain uvicorn
+    """
+    port = free_port()
+    proc_env = dict(os.environ)
+    proc_env.update({"SUPABASE_URL": supabase_url, "SUPABASE_KEY": "benchmark-key"})
+    proc_env.update(env or {})
+    if serve:
+        proc_env.update({"SERVER_HOST": "127.0.0.1", "SERVER_PORT": str(port)})
+        command = [sys.executable, "main.py"]
+    else:
+        command = [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+                   "--log-level", "warning", *(args or [])]
+    proc = subprocess.Popen(
+        command,
+        cwd=REPO_ROOT,
+        env=proc_env,
+        stdout=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                if httpx.get(f"{base_url}/ready", timeout=1).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if proc.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError("API server failed to start")
+            time.sleep(0.05)
+        yield ApiProcess(url=base_url, pid=proc.pid)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
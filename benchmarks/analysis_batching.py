@@ -0,0 +1,96 @@
+"""
+Benchmark: analysis throughput and latency with and without micro-batching.
+
+Runs the MicroBatchScheduler in-process in front of an engine whose cost per
+inference call is ``base + per_item * batch_size`` (a typical accelerator
+profile), with the same concurrency limit in both modes. Requests arrive at a
+fixed rate so batches form the way they would under real traffic.
+
+Usage:
+    python -m benchmarks.analysis_batching --requests 400 --rate 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Dict, Any, List
+
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:54321")
+os.environ.setdefault("SUPABASE_KEY", "benchmark-key")
+
+from app.services.analysis import StubAnalysisEngine, MicroBatchScheduler  # noqa: E402
+from benchmarks._server import summarize  # noqa: E402
+
+
+class CostModelEngine(StubAnalysisEngine):
+    """Stub engine whose latency grows slowly with batch size."""
+
+    def __init__(self, base: float, per_item: float):
+        super().__init__(base)
+        self.per_item = per_item
+
+    async def analyze_batch(self, image_urls: List[str]) -> List[Dict[str, Any]]:
+        await asyncio.sleep(self.per_item * len(image_urls))
+        return await super().analyze_batch(image_urls)
+
+
+async def run_mode(args: argparse.Namespace, max_batch_size: int) -> dict:
+    engine = CostModelEngine(args.base, args.per_item)
+    scheduler = MicroBatchScheduler(
+        engine,
+        max_batch_size=max_batch_size,
+        max_wait=args.max_wait_ms / 1000,
+        max_concurrency=args.concurrency,
+    )
+    await scheduler.start()
+
+    latencies: List[float] = []
+
+    async def one(index: int) -> None:
+        start = time.perf_counter()
+        await scheduler.analyze(f"https://example.invalid/scan_{index}.jpg")
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    tasks = []
+    for index in range(args.requests):
+        tasks.append(asyncio.create_task(one(index)))
+        await asyncio.sleep(1 / args.rate)
+    await asyncio.gather(*tasks)
+    wall = time.perf_counter() - start
+    await scheduler.stop()
+
+    return {
+        "max_batch_size": max_batch_size,
+        "throughput_rps": round(args.requests / wall, 1),
+        "mean_batch_size": round(scheduler.items_dispatched / scheduler.batches_dispatched, 2),
+        "latency": summarize(latencies),
+    }
+
+
+async def run(args: argparse.Namespace) -> dict:
+    return {
+        "requests": args.requests,
+        "arrival_rate_rps": args.rate,
+        "engine": {"base_s": args.base, "per_item_s": args.per_item, "concurrency": args.concurrency},
+        "unbatched": await run_mode(args, 1),
+        "batched": await run_mode(args, args.batch_size),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare analysis with and without micro-batching")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--rate", type=float, default=200, help="Request arrival rate (per second)")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--max-wait-ms", type=float, default=20)
+    parser.add_argument("--concurrency", type=int, default=4, help="Engine concurrency limit")
+    parser.add_argument("--base", type=float, default=0.1, help="Fixed cost per inference call (s)")
+    parser.add_argument("--per-item", type=float, default=0.005, help="Extra cost per image in a call (s)")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,371 @@
+"""
+Local stand-in for the Supabase storage and PostgREST endpoints used by the API.
+
+Only implements what the backend calls: object upload (direct and through
+signed upload URLs), object info and the scans table insert/upsert/select. Every request sleeps for a configurable latency so benchmarks
+can model a slow network without touching the real project, and a
+configurable fraction of requests can be failed with 503 to model an outage.
+
+Run standalone:
+    python -m benchmarks.fake_supabase --port 54321 --latency 0.2
+"""
+import argparse
+import itertools
+import json
+import random
+import re
+import secrets
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Any, List, Optional, Tuple, Callable
+from urllib.parse import urlparse, parse_qs, parse_qsl
+
+
+SIGN_PREFIX = "/storage/v1/object/upload/sign/"
+INFO_PREFIX = "/storage/v1/object/info/"
+
+
+class FakeSupabaseState:
+    """In-memory objects and table rows shared by all request threads."""
+
+    def __init__(self, storage_latency: float = 0.0, db_latency: float = 0.0):
+        self.storage_latency = storage_latency
+        self.db_latency = db_latency
+        # Fraction of requests answered with 503 (may be changed while running)
+        self.storage_failure_rate = 0.0
+        self.db_failure_rate = 0.0
+        self.random = random.Random(0)
+        self.objects: Dict[str, int] = {}
+        # Signed upload tokens -> object key they may write
+        self.upload_tokens: Dict[str, str] = {}
+        self.tables: Dict[str, List[Dict[str, Any]]] = {}
+        self.lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def insert(
+        self, table: str, rows: List[Dict[str, Any]], on_conflict: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Insert rows; with on_conflict, rows whose column value exists are skipped."""
+        with self.lock:
+            saved = []
+            existing = table_rows = self.tables.setdefault(table, [])
+            if on_conflict:
+                existing = {r.get(on_conflict) for r in table_rows}
+            for row in rows:
+                if on_conflict and row.get(on_conflict) in existing:
+                    continue
+                record = dict(row)
+                record.setdefault("id", next(self._ids))
+                record.setdefault("created_at", datetime.now(timezone.utc).isoformat())
+                table_rows.append(record)
+                if on_conflict:
+                    existing.add(record.get(on_conflict))
+                saved.append(record)
+            return saved
+
+    def select(self, table: str, params: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """Evaluate a PostgREST query string (the subset the API uses)."""
+        limit = None
+        offset = 0
+        order: List[Tuple[str, bool]] = []
+        columns = "*"
+        predicates: List[Callable[[Dict[str, Any]], bool]] = []
+        for key, value in params:
+            if key == "limit":
+                limit = int(value)
+            elif key == "offset":
+                offset = int(value)
+            elif key == "select":
+                columns = value
+            elif key == "order":
+                for part in value.split(","):
+                    column, _, direction = part.partition(".")
+                    order.append((column, direction.startswith("desc")))
+            elif key == "or":
+                predicates.append(_parse_logical("or", value[1:-1]))
+            else:
+                predicates.append(_parse_condition(key, value))
+        with self.lock:
+            rows = [r for r in self.tables.get(table, []) if all(p(r) for p in predicates)]
+        for column, descending in reversed(order):
+            rows.sort(key=lambda r: r.get(column), reverse=descending)
+        rows = rows[offset:offset + limit if limit is not None else None]
+        return [_project(row, columns) for row in rows]
+
+
+def _split_top_level(text: str) -> List[str]:
+    """Split on commas that are not inside parentheses or quotes."""
+    parts, depth, quoted, current = [], 0, False, ""
+    for char in text:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and char == ",":
+            parts.append(current)
+            current = ""
+            continue
+        current += char
+    if current:
+        parts.append(current)
+    return parts
+
+
+def _parse_logical(operator: str, body: str) -> Callable[[Dict[str, Any]], bool]:
+    predicates = []
+    for part in _split_top_level(body):
+        if part.startswith(("and(", "or(")):
+            name, _, rest = part.partition("(")
+            predicates.append(_parse_logical(name, rest[:-1]))
+        else:
+            column, _, condition = part.partition(".")
+            predicates.append(_parse_condition(column, condition))
+    combine = all if operator == "and" else any
+    return lambda row: combine(p(row) for p in predicates)
+
+
+def _parse_condition(column: str, condition: str) -> Callable[[Dict[str, Any]], bool]:
+    op, _, raw = condition.partition(".")
+    value = raw.strip('"')
+
+    def cast(cell: Any) -> Any:
+        if isinstance(cell, (int, float)) and not isinstance(cell, bool):
+            return type(cell)(value)
+        return value
+
+    if op == "eq":
+        return lambda row: row.get(column) is not None and row.get(column) == cast(row.get(column))
+    if op in ("lt", "lte", "gt", "gte"):
+        compare = {
+            "lt": lambda a, b: a < b,
+            "lte": lambda a, b: a <= b,
+            "gt": lambda a, b: a > b,
+            "gte": lambda a, b: a >= b,
+        }[op]
+        return lambda row: row.get(column) is not None and compare(row.get(column), cast(row.get(column)))
+    if op in ("like", "ilike"):
+        pattern = _like_to_regex(value)
+        flags = re.IGNORECASE if op == "ilike" else 0
+        regex = re.compile(f"^{pattern}$", flags | re.DOTALL)
+        return lambda row: bool(regex.match(str(row.get(column, ""))))
+    if op == "cs":
+        expected = json.loads(value)
+        return lambda row: all((row.get(column) or {}).get(k) == v for k, v in expected.items())
+    raise ValueError(f"Unsupported filter operator: {op}")
+
+
+def _like_to_regex(pattern: str) -> str:
+    """Translate a LIKE pattern (%, *, _ and backslash escapes) into a regex."""
+    regex, escaped = "", False
+    for char in pattern:
+        if escaped:
+            regex += re.escape(char)
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char in "%*":
+            regex += ".*"
+        elif char == "_":
+            regex += "."
+        else:
+            regex += re.escape(char)
+    return regex
+
+
+def _project(row: Dict[str, Any], columns: str) -> Dict[str, Any]:
+    if columns == "*":
+        return dict(row)
+    projected = {}
+    for column in _split_top_level(columns):
+        alias, _, expression = column.rpartition(":")
+        source, _, json_key = expression.partition("->>")
+        value = row.get(source)
+        if json_key:
+            value = (value or {}).get(json_key)
+        projected[alias or (json_key or source)] = value
+    return projected
+
+
+def _make_handler(state: FakeSupabaseState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body are separate writes; avoid 40 ms delayed-ACK stalls
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status: int, body: Any) -> None:
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _read_body(self) -> bytes:
+            length = int(self.headers.get("Content-Length") or 0)
+            return self.rfile.read(length) if length else b""
+
+        def _drain_body(self) -> int:
+            """Discard the body in chunks (uploads can be hundreds of MB)."""
+            remaining = int(self.headers.get("Content-Length") or 0)
+            while remaining:
+                remaining -= len(self.rfile.read(min(remaining, 1024 * 1024)))
+            return int(self.headers.get("Content-Length") or 0)
+
+        def _inject_failure(self, rate: float, drain: bool = False) -> bool:
+            """Answer 503 (as storage or PostgREST would) for a `rate` fraction of requests; True if it did."""
+            if rate <= 0 or state.random.random() >= rate:
+                return False
+            if drain:
+                self._drain_body()
+            if self.command == "HEAD":
+                self.send_response(503)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+            elif self.path.startswith("/rest/v1/"):
+                self._send_json(503, {
+                    "code": "PGRST001", "message": "Database client error. Retrying the connection.",
+                    "details": None, "hint": None
+                })
+            else:
+                self._send_json(503, {"statusCode": "503", "error": "unavailable", "message": "Service Unavailable"})
+            return True
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            if url.path.startswith(SIGN_PREFIX):
+                self._drain_body()
+                time.sleep(state.storage_latency)
+                key = url.path[len(SIGN_PREFIX):]
+                token = secrets.token_urlsafe(16)
+                with state.lock:
+                    state.upload_tokens[token] = key
+                self._send_json(200, {"url": f"/object/upload/sign/{key}?token={token}"})
+            elif url.path.startswith("/storage/v1/object/"):
+                if self._inject_failure(state.storage_failure_rate, drain=True):
+                    return
+                size = self._drain_body()
+                time.sleep(state.storage_latency)
+                key = url.path[len("/storage/v1/object/"):]
+                with state.lock:
+                    state.objects[key] = size
+                self._send_json(200, {"Key": key, "Id": key})
+            elif url.path.startswith("/rest/v1/"):
+                if self._inject_failure(state.db_failure_rate, drain=True):
+                    return
+                time.sleep(state.db_latency)
+                table = url.path[len("/rest/v1/"):]
+                data = json.loads(self._read_body() or b"[]")
+                rows = data if isinstance(data, list) else [data]
+                # Upserts only ever ignore duplicates here (resolution=ignore-duplicates)
+                on_conflict = parse_qs(url.query).get("on_conflict", [None])[0]
+                saved = state.insert(table, rows, on_conflict)
+                if "return=minimal" in (self.headers.get("Prefer") or ""):
+                    self.send_response(201)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                else:
+                    self._send_json(201, saved)
+            else:
+                self._drain_body()
+                self._send_json(404, {"message": "not found"})
+
+        def do_PUT(self):
+            url = urlparse(self.path)
+            token = dict(parse_qsl(url.query)).get("token")
+            key = url.path[len(SIGN_PREFIX):]
+            if not url.path.startswith(SIGN_PREFIX) or state.upload_tokens.get(token) != key:
+                self._drain_body()
+                self._send_json(400, {"statusCode": "400", "error": "InvalidJWT", "message": "invalid signature"})
+                return
+            size = self._drain_body()
+            time.sleep(state.storage_latency)
+            with state.lock:
+                state.objects[key] = size
+            self._send_json(200, {"Key": key})
+
+        def do_DELETE(self):
+            url = urlparse(self.path)
+            bucket = url.path[len("/storage/v1/object/"):].strip("/")
+            prefixes = json.loads(self._read_body() or b"{}").get("prefixes", [])
+            time.sleep(state.storage_latency)
+            with state.lock:
+                removed = [p for p in prefixes if state.objects.pop(f"{bucket}/{p}", None) is not None]
+            self._send_json(200, [{"name": name} for name in removed])
+
+        def do_HEAD(self):
+            url = urlparse(self.path)
+            key = url.path[len("/storage/v1/object/"):]
+            if self._inject_failure(state.storage_failure_rate):
+                return
+            time.sleep(state.storage_latency)
+            with state.lock:
+                found = url.path.startswith("/storage/v1/object/") and key in state.objects
+            self.send_response(200 if found else 404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path.startswith(INFO_PREFIX):
+                time.sleep(state.storage_latency)
+                key = url.path[len(INFO_PREFIX):]
+                with state.lock:
+                    size = state.objects.get(key)
+                if size is None:
+                    self._send_json(404, {"statusCode": "404", "error": "not_found", "message": "Object not found"})
+                else:
+                    self._send_json(200, {"name": key.split("/", 1)[1], "size": size})
+            elif url.path.startswith("/rest/v1/"):
+                if self._inject_failure(state.db_failure_rate):
+                    return
+                time.sleep(state.db_latency)
+                table = url.path[len("/rest/v1/"):]
+                try:
+                    rows = state.select(table, parse_qsl(url.query))
+                except ValueError as e:
+                    self._send_json(400, {"message": str(e), "code": "PGRST100", "hint": None, "details": None})
+                    return
+                self._send_json(200, rows)
+            else:
+                self._send_json(404, {"message": "not found"})
+
+    return Handler
+
+
+def start_fake_supabase(
+    port: int = 0,
+    storage_latency: float = 0.0,
+    db_latency: float = 0.0
+):
+    """
+    Start the fake Supabase server in a background thread.
+
+    Returns:
+        (server, state) - call server.shutdown() to stop it; the bound port
+        is server.server_address[1]
+    """
+    state = FakeSupabaseState(storage_latency, db_latency)
+    server = ThreadingHTTPServer(("127.0.0.1", port), _make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds added to every request")
+    args = parser.parse_args()
+    server, _ = start_fake_supabase(args.port, args.latency, args.latency)
+    print(f"Fake Supabase listening on http://127.0.0.1:{server.server_address[1]}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,91 @@
+"""
+Load test: /health latency while concurrent uploads are in flight.
+
+Starts the fake Supabase (with injected storage/DB latency) and the API in a
+uvicorn subprocess, measures /health while idle, then again while N uploads
+run concurrently. With Supabase I/O off the event loop the two distributions
+should be roughly the same.
+
+Usage:
+    python -m benchmarks.health_under_load --uploads 50 --latency 0.5
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import List
+
+import httpx
+
+from benchmarks._server import run_api, summarize
+from benchmarks.fake_supabase import start_fake_supabase
+
+
+async def _probe_health(client: httpx.AsyncClient, stop: asyncio.Event, interval: float) -> List[float]:
+    samples = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = await client.get("/health")
+        response.raise_for_status()
+        samples.append(time.perf_counter() - start)
+        await asyncio.sleep(interval)
+    return samples
+
+
+async def _upload(client: httpx.AsyncClient, index: int, size: int) -> float:
+    start = time.perf_counter()
+    response = await client.post(
+        "/api/v1/upload",
+        files={"file": (f"scan_{index}.jpg", b"\0" * size, "image/jpeg")},
+        data={"patient_data": json.dumps({"patient_name": f"Patient {index}", "age": 50})},
+    )
+    response.raise_for_status()
+    return time.perf_counter() - start
+
+
+async def run(base_url: str, uploads: int, size: int, interval: float) -> dict:
+    limits = httpx.Limits(max_connections=uploads + 10)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        idle_stop = asyncio.Event()
+        idle_probe = asyncio.create_task(_probe_health(client, idle_stop, interval))
+        await asyncio.sleep(1)
+        idle_stop.set()
+        idle = await idle_probe
+
+        load_stop = asyncio.Event()
+        load_probe = asyncio.create_task(_probe_health(client, load_stop, interval))
+        start = time.perf_counter()
+        upload_times = await asyncio.gather(*(_upload(client, i, size) for i in range(uploads)))
+        wall = time.perf_counter() - start
+        load_stop.set()
+        loaded = await load_probe
+
+    return {
+        "uploads": uploads,
+        "upload_wall_s": round(wall, 3),
+        "upload_latency": summarize(list(upload_times)),
+        "health_idle": summarize(idle),
+        "health_under_load": summarize(loaded),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure /health latency during concurrent uploads")
+    parser.add_argument("--uploads", type=int, default=50, help="Concurrent uploads")
+    parser.add_argument("--latency", type=float, default=0.5, help="Injected Supabase latency (s)")
+    parser.add_argument("--size", type=int, default=256 * 1024, help="Upload size in bytes")
+    parser.add_argument("--interval", type=float, default=0.02, help="Delay between /health probes (s)")
+    args = parser.parse_args()
+
+    server, _ = start_fake_supabase(storage_latency=args.latency, db_latency=args.latency)
+    try:
+        supabase_url = f"http://127.0.0.1:{server.server_address[1]}"
+        with run_api(supabase_url) as api:
+            result = asyncio.run(run(api.url, args.uploads, args.size, args.interval))
+    finally:
+        server.shutdown()
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Load test: throughput, latency and peak memory of the API at fixed concurrency.
+
+Starts the fake Supabase (with injected storage/DB latency) and the API in a
+uvicorn subprocess, then for every endpoint and concurrency level runs a
+closed loop of N clients until the requested number of requests has
+completed. Upload bodies are generated from a seeded RNG (each one unique, so
+deduplication and the analysis cache do not hide the real work), which makes
+runs with the same arguments comparable.
+
+Prints one JSON document; with --baseline it also compares against an
+earlier result and exits with status 1 if throughput dropped or p95 latency
+grew by more than --tolerance.
+
+Usage:
+    python -m benchmarks.load_test --concurrency 1 10 50 --requests 200
+    python -m benchmarks.load_test --output baseline.json
+    python -m benchmarks.load_test --baseline baseline.json --tolerance 0.2
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import sys
+import time
+from typing import Any, Callable, Awaitable, Dict, List, Optional
+
+import httpx
+
+from benchmarks._server import peak_rss_mb, reset_peak_rss, run_api, summarize
+from benchmarks.fake_supabase import start_fake_supabase
+
+Request = Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]]
+
+
+def _health_request() -> Request:
+    async def request(client: httpx.AsyncClient, index: int) -> httpx.Response:
+        return await client.get("/health")
+    return request
+
+
+def _upload_request(size: int, seed: int) -> Request:
+    payload = random.Random(seed).randbytes(size)
+
+    async def request(client: httpx.AsyncClient, index: int) -> httpx.Response:
+        # Unique prefix per request: same size and cost, different content hash
+        body = f"{seed}:{index}:".encode().ljust(32, b"\0") + payload[32:]
+        return await client.post(
+            "/api/v1/upload",
+            files={"file": (f"scan_{index}.jpg", body, "application/octet-stream")},
+            data={"patient_data": json.dumps({"patient_name": f"Patient {index}", "age": 50})},
+        )
+    return request
+
+
+async def run_level(
+    base_url: str,
+    request: Request,
+    concurrency: int,
+    requests: int,
+    warmup: int,
+    first_index: int
+) -> Dict[str, Any]:
+    """Run `requests` requests with `concurrency` clients in a closed loop."""
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=300, limits=limits) as client:
+        for i in range(warmup):
+            await request(client, first_index + i)
+
+        next_index = first_index + warmup
+        last_index = next_index + requests
+        latencies: List[float] = []
+        errors: Dict[str, int] = {}
+
+        async def worker() -> None:
+            nonlocal next_index
+            while next_index < last_index:
+                index = next_index
+                next_index += 1
+                start = time.perf_counter()
+                try:
+                    response = await request(client, index)
+                    outcome = None if response.status_code < 400 else str(response.status_code)
+                except httpx.HTTPError as e:
+                    outcome = type(e).__name__
+                if outcome is None:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    errors[outcome] = errors.get(outcome, 0) + 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        wall = time.perf_counter() - start
+
+    return {
+        "requests": requests,
+        "errors": errors,
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(len(latencies) / wall, 2),
+        "latency": summarize(latencies),
+    }
+
+
+def compare(result: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Regressions of result against baseline, matched by (endpoint, concurrency)."""
+    previous = {(r["endpoint"], r["concurrency"]): r for r in baseline["results"]}
+    regressions = []
+    for current in result["results"]:
+        key = (current["endpoint"], current["concurrency"])
+        old = previous.get(key)
+        if old is None:
+            continue
+        label = f"{key[0]} @ {key[1]}"
+        if current["throughput_rps"] < old["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{label}: throughput {old['throughput_rps']} -> {current['throughput_rps']} req/s"
+            )
+        if current["latency"]["p95_ms"] > old["latency"]["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{label}: p95 {old['latency']['p95_ms']} -> {current['latency']['p95_ms']} ms"
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test the API against a fake Supabase")
+    parser.add_argument("--endpoints", nargs="+", choices=["upload", "health"], default=["upload", "health"])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50], help="Concurrent clients")
+    parser.add_argument("--requests", type=int, default=200, help="Measured requests per level")
+    parser.add_argument("--warmup", type=int, default=5, help="Unmeasured requests before each level")
+    parser.add_argument("--size", type=int, default=256 * 1024, help="Upload size in bytes")
+    parser.add_argument("--storage-latency", type=float, default=0.05, help="Injected storage latency (s)")
+    parser.add_argument("--db-latency", type=float, default=0.02, help="Injected PostgREST latency (s)")
+    parser.add_argument("--analysis-latency", type=float, default=0.1, help="Stub analysis latency (s)")
+    parser.add_argument("--storage-failure-rate", type=float, default=0.0, help="Fraction of storage calls failing with 503")
+    parser.add_argument("--db-failure-rate", type=float, default=0.0, help="Fraction of PostgREST calls failing with 503")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for generated upload bodies")
+    parser.add_argument("--output", help="Also write the JSON result to this file")
+    parser.add_argument("--baseline", help="Earlier result to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression")
+    args = parser.parse_args()
+
+    config = {key: value for key, value in vars(args).items() if key not in ("output", "baseline")}
+    requests: Dict[str, Request] = {
+        "upload": _upload_request(args.size, args.seed),
+        "health": _health_request(),
+    }
+
+    results = []
+    server, state = start_fake_supabase(storage_latency=args.storage_latency, db_latency=args.db_latency)
+    state.storage_failure_rate = args.storage_failure_rate
+    state.db_failure_rate = args.db_failure_rate
+    try:
+        supabase_url = f"http://127.0.0.1:{server.server_address[1]}"
+        env = {"ANALYSIS_STUB_LATENCY": str(args.analysis_latency), "LOG_LEVEL": "WARNING"}
+        with run_api(supabase_url, env=env) as api:
+            index = 0
+            for endpoint in args.endpoints:
+                for concurrency in args.concurrency:
+                    reset_peak_rss(api.pid)
+                    level = asyncio.run(run_level(
+                        api.url, requests[endpoint], concurrency, args.requests, args.warmup, index
+                    ))
+                    index += args.warmup + args.requests
+                    results.append({
+                        "endpoint": endpoint,
+                        "concurrency": concurrency,
+                        **level,
+                        "peak_rss_mb": peak_rss_mb(api.pid),
+                    })
+    finally:
+        server.shutdown()
+
+    result = {
+        "config": config,
+        "python": platform.python_version(),
+        "results": results,
+    }
+    regressions: Optional[List[str]] = None
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare(result, json.load(baseline_file), args.tolerance)
+        result["regressions"] = regressions
+
+    document = json.dumps(result, indent=2)
+    print(document)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(document + "\n")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
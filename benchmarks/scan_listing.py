@@ -0,0 +1,134 @@
+"""
+Benchmark: GET /api/v1/scans page latency versus paging depth.
+
+Measures list_scans (keyset pagination on created_at, id) at increasing
+depths into the table and compares it with OFFSET pagination at the same
+depth. With add_scan_indexes.sql applied, keyset latency should stay flat up
+to 1M rows while OFFSET grows linearly.
+
+Needs a real Postgres behind PostgREST (e.g. `supabase start` locally, or a
+throwaway project) configured through SUPABASE_URL / SUPABASE_KEY. --seed
+inserts synthetic rows into the scans table, so never point it at production.
+
+Usage:
+    python -m benchmarks.scan_listing --seed 1000000 --depths 0 10000 100000 500000 990000
+    python -m benchmarks.scan_listing --fake --seed 5000 --depths 0 1000 4000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List
+
+
+def _seed_rows(db, count: int, chunk: int) -> None:
+    from app.services.scans import SCANS_TABLE
+
+    diagnoses = ["Rheumatoid Arthritis", "Osteoarthritis", "Psoriatic Arthritis", "Normal"]
+    severities = ["Mild", "Moderate", "Severe"]
+    start = datetime.now(timezone.utc) - timedelta(seconds=count)
+    for offset in range(0, count, chunk):
+        rows = []
+        for i in range(offset, min(count, offset + chunk)):
+            rows.append({
+                "patient_name": f"Patient {random.randint(0, 99999):05d}",
+                "age": random.randint(18, 95),
+                "file_url": f"https://example.invalid/scans/{i}.jpg",
+                "analysis": {
+                    "diagnosis": random.choice(diagnoses),
+                    "severity": random.choice(severities),
+                    "confidence": round(random.random(), 3),
+                    # Padding so skipping the JSONB column in projections matters
+                    "recommendations": ["Follow up with rheumatologist"] * 20,
+                },
+                "created_at": (start + timedelta(seconds=i)).isoformat(),
+            })
+        db.table(SCANS_TABLE).insert(rows, returning="minimal").execute()
+
+
+async def _time(func: Callable[[], Awaitable[Any]], repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        await func()
+        samples.append(time.perf_counter() - start)
+    return round(statistics.median(samples) * 1000, 2)
+
+
+async def run(db, depths: List[int], page_size: int, repeats: int) -> List[Dict[str, Any]]:
+    from app.core.database import run_db
+    from app.services.scans import SCANS_TABLE, SUMMARY_COLUMNS, encode_cursor, list_scans
+
+    results = []
+    for depth in depths:
+        cursor = None
+        if depth:
+            # Position the keyset cursor on row `depth` (setup, not measured)
+            anchor = await run_db(
+                db.table(SCANS_TABLE).select("id,created_at")
+                .order("created_at", desc=True).order("id", desc=True)
+                .range(depth - 1, depth - 1).execute
+            )
+            if not anchor.data:
+                break
+            cursor = encode_cursor(anchor.data[0]["created_at"], anchor.data[0]["id"])
+
+        keyset_ms = await _time(lambda: list_scans(db, page_size, cursor=cursor), repeats)
+        offset_ms = await _time(
+            lambda: run_db(
+                db.table(SCANS_TABLE).select(SUMMARY_COLUMNS)
+                .order("created_at", desc=True).order("id", desc=True)
+                .range(depth, depth + page_size - 1).execute
+            ),
+            repeats,
+        )
+        filtered_ms = await _time(
+            lambda: list_scans(db, page_size, cursor=cursor, severity="Severe", min_age=40, max_age=60),
+            repeats,
+        )
+        results.append({
+            "depth": depth,
+            "keyset_p50_ms": keyset_ms,
+            "keyset_filtered_p50_ms": filtered_ms,
+            "offset_p50_ms": offset_ms,
+        })
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Scan listing latency vs paging depth")
+    parser.add_argument("--seed", type=int, default=0, help="Insert this many synthetic rows first")
+    parser.add_argument("--seed-chunk", type=int, default=1000, help="Rows per bulk insert while seeding")
+    parser.add_argument("--depths", type=int, nargs="+", default=[0, 10_000, 100_000, 500_000, 990_000])
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--fake", action="store_true", help="Use the local fake Supabase (functional check only)")
+    args = parser.parse_args()
+
+    server = None
+    if args.fake:
+        from benchmarks.fake_supabase import start_fake_supabase
+
+        server, _ = start_fake_supabase()
+        os.environ["SUPABASE_URL"] = f"http://127.0.0.1:{server.server_address[1]}"
+        os.environ["SUPABASE_KEY"] = "benchmark-key"
+
+    from app.core.database import get_db
+
+    db = get_db()
+    try:
+        if args.seed:
+            _seed_rows(db, args.seed, args.seed_chunk)
+        results = asyncio.run(run(db, args.depths, args.page_size, args.repeats))
+    finally:
+        if server is not None:
+            server.shutdown()
+    print(json.dumps({"page_size": args.page_size, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Micro-benchmark: per-request cost of parsing patient data and serializing scan responses.
+
+Response strategies, for a scan whose analysis result is --sizes KB of JSON:
+
+* jsonable_json - validate against a ScanResponse with a free-form
+  Dict[str, Any] analysis, jsonable_encoder, then json.dumps (FastAPI's
+  classic response_model path)
+* pydantic_json - validate against the typed ScanResponse and dump to JSON
+  bytes in pydantic-core (FastAPI's path today when a response_model is set)
+* orjson - orjson.dumps of the already validated dict, no re-validation
+  (what the upload, direct-upload and job endpoints now send)
+
+Parsing strategies for the patient_data form field: json.loads alone (no
+validation), json.loads + PatientData(**data), PatientData.model_validate_json.
+
+Usage:
+    python -m benchmarks.serialization --sizes 2 64 512
+"""
+import argparse
+import json
+import random
+import statistics
+import timeit
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.models.schemas import PatientData, ScanResponse
+from app.services.ai_stub import mock_analysis
+
+
+class FreeFormScanResponse(ScanResponse):
+    """ScanResponse as it was before AnalysisResult: analysis_result is Dict[str, Any]."""
+
+    analysis_result: Dict[str, Any]
+
+
+def make_scan(analysis_kb: float, rng: random.Random) -> Dict[str, Any]:
+    """A scan response dict whose analysis_result serializes to about analysis_kb KB."""
+    image_url = "https://example.supabase.co/storage/v1/object/public/scans/" + "ab" * 32 + ".jpg"
+    analysis = mock_analysis(image_url)
+    analysis["joint_scores"] = []
+    # Per-joint findings, as a detailed model would report them
+    while len(orjson.dumps(analysis)) < analysis_kb * 1024:
+        analysis["joint_scores"].append({
+            "joint": f"joint_{len(analysis['joint_scores'])}",
+            "synovitis": round(rng.random(), 4),
+            "erosion": round(rng.random(), 4),
+            "bbox": [rng.randint(0, 4096) for _ in range(4)],
+        })
+    return {
+        "id": "12345",
+        "patient_name": "John Doe",
+        "age": 45,
+        "image_url": image_url,
+        "analysis_result": analysis,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "derivatives": None,
+    }
+
+
+def _per_call_us(func: Callable[[], Any], min_time: float) -> float:
+    """Median microseconds per call over 5 timing runs of at least min_time seconds each."""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+    runs = timer.repeat(repeat=5, number=number)
+    return round(statistics.median(runs) / number * 1e6, 2)
+
+
+def bench_responses(scan: Dict[str, Any], min_time: float) -> Dict[str, float]:
+    free_form = TypeAdapter(FreeFormScanResponse)
+    typed = TypeAdapter(ScanResponse)
+
+    def jsonable_json() -> bytes:
+        content = jsonable_encoder(free_form.validate_python(scan))
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+    def pydantic_json() -> bytes:
+        return typed.dump_json(typed.validate_python(scan))
+
+    def orjson_dumps() -> bytes:
+        return orjson.dumps(scan)
+
+    return {
+        "jsonable_json_us": _per_call_us(jsonable_json, min_time),
+        "pydantic_json_us": _per_call_us(pydantic_json, min_time),
+        "orjson_us": _per_call_us(orjson_dumps, min_time),
+    }
+
+
+def bench_parsing(min_time: float) -> Dict[str, float]:
+    raw = json.dumps({"patient_name": "John Doe", "age": 45})
+    return {
+        "json_loads_us": _per_call_us(lambda: json.loads(raw), min_time),
+        "json_loads_then_model_us": _per_call_us(lambda: PatientData(**json.loads(raw)), min_time),
+        "model_validate_json_us": _per_call_us(lambda: PatientData.model_validate_json(raw), min_time),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure response serialization cost per request")
+    parser.add_argument("--sizes", type=float, nargs="+", default=[2, 64, 512], help="Analysis payload sizes in KB")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds per timing run")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    responses: List[Dict[str, Any]] = []
+    for size in args.sizes:
+        scan = make_scan(size, rng)
+        result = {"analysis_kb": size, "response_bytes": len(orjson.dumps(scan))}
+        result.update(bench_responses(scan, args.min_time))
+        result["speedup_vs_jsonable_json"] = round(result["jsonable_json_us"] / result["orjson_us"], 1)
+        responses.append(result)
+
+    print(json.dumps({"responses": responses, "patient_data": bench_parsing(args.min_time)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Benchmark: cold-start time of the API.
+
+Launches `uvicorn main:app` repeatedly (against the fake Supabase) and
+measures, from process launch:
+
+* import_process_ms - wall time of a separate `python -c "import main"`
+* first_response_ms - time until /health first answers 200 (liveness)
+* ready_ms - time until /ready first answers 200 (warm-up finished)
+
+The interpreter's own start-up time and the time to import fastapi alone
+are reported separately as a floor the application cannot go below.
+Exits with status 1 if the median time to first response misses --target-ms.
+
+Usage:
+    python -m benchmarks.startup --runs 5 --target-ms 300
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+import httpx
+
+from benchmarks._server import REPO_ROOT, free_port
+from benchmarks.fake_supabase import start_fake_supabase
+
+
+def _wait_for(client: httpx.Client, url: str, start: float, deadline: float) -> float:
+    """Poll url until it returns 200; seconds since start."""
+    while time.perf_counter() < deadline:
+        try:
+            if client.get(url).status_code == 200:
+                return time.perf_counter() - start
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.002)
+    raise RuntimeError(f"{url} did not become available")
+
+
+def _time_command(args: List[str], env: Dict[str, str]) -> float:
+    start = time.perf_counter()
+    subprocess.run(args, cwd=REPO_ROOT, env=env, check=True)
+    return time.perf_counter() - start
+
+
+def measure_once(env: Dict[str, str]) -> Dict[str, float]:
+    """Start the server once and time liveness and readiness."""
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=REPO_ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        with httpx.Client(timeout=1) as client:
+            deadline = start + 30
+            first_response = _wait_for(client, f"{base_url}/health", start, deadline)
+            ready = _wait_for(client, f"{base_url}/ready", start, deadline)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+    import_time = _time_command([sys.executable, "-c", "import main"], env)
+    return {
+        "first_response_ms": round(first_response * 1000, 1),
+        "ready_ms": round(ready * 1000, 1),
+        "import_process_ms": round(import_time * 1000, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure API cold-start time")
+    parser.add_argument("--runs", type=int, default=5, help="Server launches to measure")
+    parser.add_argument("--target-ms", type=float, default=300, help="Target median time to first response")
+    args = parser.parse_args()
+
+    server, _ = start_fake_supabase()
+    env = dict(os.environ)
+    env.update({
+        "SUPABASE_URL": f"http://127.0.0.1:{server.server_address[1]}",
+        "SUPABASE_KEY": "benchmark-key",
+        "LOG_LEVEL": "WARNING",
+    })
+    try:
+        # One unmeasured launch so every measured run starts with warm .pyc files
+        measure_once(env)
+        runs = [measure_once(env) for _ in range(args.runs)]
+    finally:
+        server.shutdown()
+
+    interpreter = min(_time_command([sys.executable, "-c", "pass"], env) for _ in range(3))
+    framework = min(_time_command([sys.executable, "-c", "import fastapi, uvicorn"], env) for _ in range(3))
+    median_first = statistics.median(run["first_response_ms"] for run in runs)
+    result = {
+        "runs": runs,
+        "median_first_response_ms": median_first,
+        "median_ready_ms": statistics.median(run["ready_ms"] for run in runs),
+        "median_import_process_ms": statistics.median(run["import_process_ms"] for run in runs),
+        "interpreter_start_ms": round(interpreter * 1000, 1),
+        "framework_import_process_ms": round(framework * 1000, 1),
+        "target_ms": args.target_ms,
+        "meets_target": median_first <= args.target_ms,
+    }
+    print(json.dumps(result, indent=2))
+    if not result["meets_target"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Memory benchmark: peak server RSS while uploading increasingly large scans.
+
+For each size a fresh API process is started against the fake Supabase, a
+single file of that size is uploaded (streamed from disk by the client), and
+the server's peak RSS (VmHWM) is recorded. With the streaming upload path the
+peak should stay roughly constant from 1 MB to 200 MB. Linux only.
+
+Usage:
+    python -m benchmarks.upload_memory --sizes 1 10 50 100 200
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import httpx
+
+from benchmarks._server import run_api, peak_rss_mb
+from benchmarks.fake_supabase import start_fake_supabase
+
+MB = 1024 * 1024
+
+
+def _make_file(directory: str, size_mb: int) -> str:
+    path = os.path.join(directory, f"scan_{size_mb}mb.bin")
+    block = os.urandom(MB)
+    with open(path, "wb") as out:
+        for _ in range(size_mb):
+            out.write(block)
+    return path
+
+
+def measure(supabase_url: str, path: str) -> dict:
+    with run_api(supabase_url) as api:
+        baseline = peak_rss_mb(api.pid)
+        start = time.perf_counter()
+        with open(path, "rb") as scan:
+            response = httpx.post(
+                f"{api.url}/api/v1/upload",
+                files={"file": (os.path.basename(path), scan, "application/octet-stream")},
+                data={"patient_data": json.dumps({"patient_name": "Benchmark", "age": 50})},
+                timeout=300,
+            )
+        response.raise_for_status()
+        elapsed = time.perf_counter() - start
+        peak = peak_rss_mb(api.pid)
+    return {
+        "size_mb": os.path.getsize(path) // MB,
+        "startup_rss_mb": baseline,
+        "peak_rss_mb": peak,
+        "upload_s": round(elapsed, 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Peak server RSS vs upload size")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 50, 100, 200], help="File sizes in MB")
+    args = parser.parse_args()
+
+    server, _ = start_fake_supabase()
+    results = []
+    try:
+        supabase_url = f"http://127.0.0.1:{server.server_address[1]}"
+        with tempfile.TemporaryDirectory() as directory:
+            for size_mb in args.sizes:
+                path = _make_file(directory, size_mb)
+                results.append(measure(supabase_url, path))
+                os.remove(path)
+    finally:
+        server.shutdown()
+    print(json.dumps({"results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
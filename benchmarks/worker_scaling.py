@@ -0,0 +1,110 @@
+"""
+Benchmark: upload throughput as the API scales from 1 to N worker processes.
+
+For every --workers value, starts the production entry point (`python
+main.py` with SERVER_WORKERS set) and runs the load_test upload loop at
+--concurrency clients. Uploads are large and the injected latencies small, so
+the per-request CPU work (multipart parsing, hashing, JSON) dominates and
+throughput should grow with workers until the cores are used up.
+
+The fake Supabase runs in its own process so it does not share a GIL with the
+load generator; on machines with few cores both still compete with the
+workers, so compare scaling efficiency rather than absolute numbers.
+
+Usage:
+    python -m benchmarks.worker_scaling --workers 1 2 4 8 --concurrency 64
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List
+
+import httpx
+
+from benchmarks._server import REPO_ROOT, free_port, run_api
+from benchmarks.load_test import _upload_request, run_level
+
+
+@contextmanager
+def fake_supabase_process(latency: float) -> Iterator[str]:
+    """Run the fake Supabase in a subprocess (so it has its own GIL) and yield its URL."""
+    port = free_port()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.fake_supabase", "--port", str(port), "--latency", str(latency)],
+        cwd=REPO_ROOT,
+        stdout=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 10
+        while True:
+            try:
+                httpx.get(url, timeout=1)
+                break
+            except httpx.HTTPError:
+                pass
+            if proc.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError("Fake Supabase failed to start")
+            time.sleep(0.05)
+        yield url
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def main() -> None:
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Measure upload throughput from 1 to N workers")
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, 2, 4, cpus}), help="Worker counts")
+    parser.add_argument("--concurrency", type=int, default=64, help="Concurrent clients")
+    parser.add_argument("--requests", type=int, default=400, help="Measured uploads per worker count")
+    parser.add_argument("--warmup", type=int, default=20, help="Unmeasured uploads per worker count")
+    parser.add_argument("--size", type=int, default=1024 * 1024, help="Upload size in bytes")
+    parser.add_argument("--latency", type=float, default=0.005, help="Injected storage/PostgREST latency (s)")
+    parser.add_argument("--analysis-latency", type=float, default=0.01, help="Stub analysis latency (s)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for generated upload bodies")
+    args = parser.parse_args()
+
+    request = _upload_request(args.size, args.seed)
+    env = {
+        "ANALYSIS_STUB_LATENCY": str(args.analysis_latency),
+        "LOG_LEVEL": "WARNING",
+        # Enough DB threads and bulkhead slots that they are not the bottleneck
+        "DB_EXECUTOR_WORKERS": "64",
+        "STORAGE_MAX_CONCURRENCY": "32",
+        "DB_MAX_CONCURRENCY": "32",
+    }
+    results: List[Dict[str, Any]] = []
+    index = 0
+    with fake_supabase_process(args.latency) as supabase_url:
+        for workers in args.workers:
+            with run_api(supabase_url, env={**env, "SERVER_WORKERS": str(workers)}, serve=True) as api:
+                level = asyncio.run(run_level(
+                    api.url, request, args.concurrency, args.requests, args.warmup, index
+                ))
+            index += args.warmup + args.requests
+            results.append({"workers": workers, **level})
+
+    single = next((r["throughput_rps"] for r in results if r["workers"] == 1), None)
+    for result in results:
+        if single:
+            result["speedup"] = round(result["throughput_rps"] / single, 2)
+            # 1.0 = perfectly linear scaling
+            result["efficiency"] = round(result["speedup"] / result["workers"], 2)
+
+    print(json.dumps({
+        "config": vars(args),
+        "cpus": cpus,
+        "python": platform.python_version(),
+        "results": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,57 @@
 """Main FastAPI application entry point."""
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from app.core.config import settings
+from app.core.logger import setup_logging
+from app.core.metrics import ANALYSIS_PENDING, EVENT_SUBSCRIBERS, JOB_QUEUE_DEPTH, SCAN_WRITES_PENDING
 from app.api.endpoints import router
+from app.api.middleware import MaxBodySizeMiddleware, RequestContextMiddleware, REQUEST_ID_HEADER
+from app.core.database import init_db, close_db, shutdown_db_executor, is_db_initialized
+from app.services.jobs import get_job_pool
+from app.services.cache import get_analysis_cache, get_response_cache
+from app.services.analysis import get_analysis_scheduler
+from app.services.imaging import shutdown_process_pool
+from app.services.resumable import get_resumable_store
+from app.services.scans import get_scan_writer
+from app.services.events import get_event_broker
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background workers and warm up shared clients; tear down on shutdown."""
+    setup_logging()
+    # Build the Supabase client in the background so startup is not held up by
+    # its imports; requests that need it first just create it themselves.
+    warm_up = asyncio.create_task(asyncio.to_thread(init_db))
+    app.state.warm_up = warm_up
+    if settings.scan_write_behind:
+        # Replays rows a previous run logged but did not insert
+        await get_scan_writer().start()
+        SCAN_WRITES_PENDING.set_function(get_scan_writer().pending)
+    scheduler = get_analysis_scheduler()
+    await scheduler.start()
+    job_pool = get_job_pool()
+    await job_pool.start()
+    JOB_QUEUE_DEPTH.set_function(job_pool.queue.depth)
+    ANALYSIS_PENDING.set_function(scheduler.pending)
+    EVENT_SUBSCRIBERS.set_function(get_event_broker().subscribers)
+    await get_resumable_store().start(settings.resumable_purge_interval)
+    yield
+    await asyncio.gather(warm_up, return_exceptions=True)
+    await get_resumable_store().stop()
+    await job_pool.stop()
+    await scheduler.stop()
+    if settings.scan_write_behind:
+        await get_scan_writer().stop()
+    shutdown_process_pool()
+    await get_analysis_cache().close()
+    await get_response_cache().close()
+    shutdown_db_executor()
+    close_db()
 
 
 # Initialize FastAPI app
@@ -10,7 +59,8 @@ app = FastAPI(
     title=settings.api_title,
     version=settings.api_version,
     description="RheumaLens API for medical scan analysis",
-    debug=settings.debug
+    debug=settings.debug,
+    lifespan=lifespan
 )
 
 # Configure CORS middleware
@@ -20,8 +70,15 @@ app.add_middleware(
     allow_credentials=False,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[REQUEST_ID_HEADER, "ETag"],
 )
 
+# Reject oversized uploads before they are spooled
+app.add_middleware(MaxBodySizeMiddleware, max_body_size=settings.max_upload_bytes)
+
+# Outermost: request ids and request metrics cover every response, including 413s
+app.add_middleware(RequestContextMiddleware)
+
 # Include routers
 app.include_router(router)
 
@@ -45,19 +102,32 @@ async def health_check() -> dict:
     }
 
 
-if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(
-        "main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=settings.debug
-    )
-
-
+@app.get("/metrics", tags=["health"], include_in_schema=False)
+async def metrics() -> Response:
+    """Prometheus metrics: request rates, stage latencies, in-flight requests and errors."""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
 
 
+@app.get("/ready", tags=["health"])
+async def readiness_check() -> JSONResponse:
+    """
+    Readiness probe: 200 once the Supabase client is built and the workers run.
 
+    Unlike /health (liveness), this returns 503 while the instance is still
+    warming up or if the client could not be created, so load balancers hold
+    traffic back without restarting the process.
+    """
+    if not app.state.warm_up.done():
+        return JSONResponse({"status": "starting"}, status_code=503)
+    if not is_db_initialized():
+        try:
+            await asyncio.to_thread(init_db)
+        except Exception as e:
+            return JSONResponse({"status": "unavailable", "detail": str(e)}, status_code=503)
+    return JSONResponse({"status": "ready", "service": "RheumaLens API"})
 
 
+if __name__ == "__main__":
+    from app.core.server import serve
 
+    serve()
@@ -0,0 +1,45 @@
+"""Tests for metadata stripping of stored originals."""
+from PIL import ExifTags, Image
+
+from app.services.image_worker import strip_metadata
+
+
+def _exif() -> Image.Exif:
+    exif = Image.Exif()
+    exif[ExifTags.Base.Orientation] = 6
+    exif[ExifTags.Base.Make] = "Phone"
+    exif.get_ifd(ExifTags.IFD.GPSInfo)[ExifTags.GPS.GPSLatitudeRef] = "N"
+    return exif
+
+
+def _assert_stripped(source: Image.Image, out_path) -> None:
+    with Image.open(out_path) as out:
+        assert out.format == "JPEG"
+        assert getattr(out, "n_frames", 1) == 1
+        assert dict(out.getexif()) == {ExifTags.Base.Orientation: 6}
+        assert "comment" not in out.info
+        assert out.size == source.size
+        assert out.quantization == source.quantization
+
+
+def test_strip_metadata_keeps_jpeg(tmp_path):
+    path, out_path = tmp_path / "scan.jpg", tmp_path / "out"
+    Image.new("RGB", (64, 48), (200, 10, 10)).save(path, format="JPEG", exif=_exif(), comment=b"secret")
+
+    assert strip_metadata(str(path), str(out_path)) == "JPEG"
+    with Image.open(path) as source:
+        _assert_stripped(source, out_path)
+
+
+def test_strip_metadata_treats_mpo_as_jpeg(tmp_path):
+    # Phone cameras write MPO: a primary JPEG plus extra frames
+    path, out_path = tmp_path / "scan.jpg", tmp_path / "out"
+    primary = Image.new("RGB", (64, 48), (200, 10, 10))
+    primary.save(
+        path, format="MPO", save_all=True, append_images=[Image.new("RGB", (64, 48))], exif=_exif()
+    )
+
+    assert strip_metadata(str(path), str(out_path)) == "JPEG"
+    with Image.open(path) as source:
+        assert source.format == "MPO"
+        _assert_stripped(source, out_path)